@@ -1,14 +1,12 @@
-import subprocess
-import time
-import winsound
-import webbrowser
 import threading
 import dearpygui.dearpygui as dpg
 import scripts.window as window
 import logging
 from typing import Optional, Tuple
 from scripts.timer import calculate_exp, calculate_gold
-from scripts.input import KeyListener
+from scripts.input import KeyListener, farm_sequence
+from scripts.launch import LaunchJob
+from scripts.schema import DEFAULT_CONFIG, WIDGET_TAGS
 
 logger = logging.getLogger(__name__)
 
@@ -36,11 +34,14 @@ class Callbacks:
         self.keyseq = self.gui.keyseq
         self.state = self.gui.state
         self.update = self.gui.update
+        self.ui = self.timer.ui
+        self.settings = self.timer.settings
         self.listener = KeyListener()
         self.launch_timer = CooldownTimer(2.0, self._launch_state_reset)
         self.launch_count = 0
         self.timing_timer = CooldownTimer(2.0, self._general_state_reset)
         self.timing_count = 0
+        self.launch_job = LaunchJob(self._launch_event, self._launch_ready)
 
     # ui nav buttons
     # ---------------------------------------------------
@@ -67,30 +68,21 @@ class Callbacks:
         else:
             self.state['hwnd'] = window.find()
             if self.state['hwnd']:
-                sequence = ['wait_restart', 'spam_menu', 'open_menu', 'disconnect', 'reconnect']
-                if dpg.get_value('open_menu_hold'):
-                    sequence = ['open_menu_hold' if item == 'open_menu' else item for item in sequence]
-                if dpg.get_value('open_menu_fix'):
-                    sequence = ['open_menu_fix' if item == 'open_menu' else item for item in sequence]
-                if dpg.get_value('open_menu_fix2'):
-                    sequence = [sub for item in sequence for sub in (['open_menu_fix', 'open_menu_fix'] if item == 'open_menu' else [item])]
-                self.timer.start(dpg.get_value('match_time'), sequence)
+                settings = self.settings.capture()
+                self.timer.start(settings.match_time, farm_sequence(settings))
                 if self.timer.running:
-                    dpg.configure_item('run_button', label='ä')
-                    dpg.configure_item('run_button_tooltip', default_value='stop')
+                    self.ui.configure('run_button', label='ä')
+                    self.ui.set_value('run_button_tooltip', 'stop')
 
             else:
-                dpg.configure_item('farm_status', label='brawlhalla window not found')
+                self.ui.status('brawlhalla window not found')
 
     def stop_button(self):
         self.timer.stop()
 
     def on_timer_stopped(self):
-        with dpg.mutex():
-            dpg.set_frame_callback(
-                dpg.get_frame_count() + 1,
-                callback=lambda: [dpg.configure_item('run_button', label='â'), dpg.configure_item('run_button_tooltip', default_value='start')]
-            )
+        self.ui.configure('run_button', label='â')
+        self.ui.set_value('run_button_tooltip', 'start')
 
     # ---------------------------------------------------
 
@@ -99,91 +91,86 @@ class Callbacks:
         if self.state['hwnd'] and self.timer.running and not self.timer.pressing:
             self.timer.pause()
             sequence = ['open_menu', 'disconnect', 'reconnect']
-            if dpg.get_value('open_menu_hold'):
+            if self.settings.current.open_menu_hold:
                 sequence = ['open_menu_hold' if item == 'open_menu' else item for item in sequence]
-            self.keyseq.action(sequence, lambda: self.timer.running, self.state['hwnd'])
+            self.keyseq.action(sequence, lambda: self.timer.running, self.state['hwnd'], self.timer.sleep)
             self.timer.pause()
         else:
-            dpg.configure_item('farm_status', label='not running')
+            self.ui.status('not running')
 
     def toggle_button(self):
         self.state['hwnd'] = window.find()
         if not self.state['hwnd']:
-            dpg.configure_item('farm_status', label='brawlhalla window not found')
+            self.ui.status('brawlhalla window not found')
             return
         if window.visible(self.state['hwnd']):
             window.hide(self.state['hwnd'])
-            dpg.configure_item('farm_status', label='brawlhalla window hidden')
+            self.ui.status('brawlhalla window hidden')
             dpg.configure_item('toggle_button', label='N')
             dpg.configure_item('toggle_button_tooltip', default_value='show brawlhalla window')
         else:
             window.show(self.state['hwnd'])
-            dpg.configure_item('farm_status', label='brawlhalla window shown')
+            self.ui.status('brawlhalla window shown')
             dpg.configure_item('toggle_button', label='O')
             dpg.configure_item('toggle_button_tooltip', default_value='hide brawlhalla window')
 
     def _launch_state_reset(self):
         self.launch_count = 0
         text = 'stop brawlhalla' if window.running() else 'start brawlhalla'
-        dpg.configure_item('farm_status', label='inactive')
-        dpg.configure_item('launch_button_tooltip', default_value=text)
+        self.ui.status('inactive')
+        self.ui.set_value('launch_button_tooltip', text)
+
+    def _launch_event(self, event, data):
+        """Show progress of the background launch job (called from its thread)."""
+        if event == 'starting':
+            self.ui.status('starting brawlhalla...')
+            self.ui.set_value('launch_button_tooltip', 'cancel launch')
+        elif event == 'waiting':
+            self.ui.status(f'waiting for brawlhalla ({data}s)...')
+        elif event == 'ready':
+            self.ui.status('brawlhalla started')
+            self.ui.set_value('launch_button_tooltip', 'stop brawlhalla')
+        else:
+            messages = {
+                'timeout': 'brawlhalla failed to start (timeout)',
+                'cancelled': 'launch cancelled',
+            }
+            self.ui.status(messages.get(event, data))
+            self.ui.set_value('launch_button_tooltip', 'start brawlhalla')
+
+    def _launch_ready(self, hwnd):
+        self.state['hwnd'] = hwnd
+
     def launch_button(self):
         """Handle Brawlhalla launch/close button with error recovery."""
         try:
-            if window.running():
+            if self.launch_job.running:
+                self.launch_job.cancel()
+            elif window.running():
                 self.launch_count += 1
                 if self.launch_count == 1:
-                    dpg.configure_item('farm_status', label='already running! (close?)')
-                    dpg.configure_item('launch_button_tooltip', default_value='click again to stop')
+                    self.ui.status('already running! (close?)')
+                    self.ui.set_value('launch_button_tooltip', 'click again to stop')
                     self.launch_timer.start()
                 elif self.launch_count == 2:
-                    dpg.configure_item('farm_status', label='terminating brawlhalla...')
-                    dpg.configure_item('launch_button_tooltip', default_value='start brawlhalla')
+                    self.ui.status('terminating brawlhalla...')
+                    self.ui.set_value('launch_button_tooltip', 'start brawlhalla')
                     
                     # Safely close the game
                     if window.close():
-                        dpg.configure_item('farm_status', label='brawlhalla terminated')
+                        self.ui.status('brawlhalla terminated')
                     else:
-                        dpg.configure_item('farm_status', label='failed to terminate brawlhalla')
+                        self.ui.status('failed to terminate brawlhalla')
                         
                     self.launch_count = 0
                     self.launch_timer.cancel()
                     self.timer.stop()
             else:
-                try:
-                    # Launch Brawlhalla through Steam
-                    result = subprocess.run(
-                        'cmd /c start steam://rungameid/291550', 
-                        check=False, 
-                        timeout=10
-                    )
-                    
-                    dpg.configure_item('farm_status', label='starting brawlhalla...')
-                    dpg.configure_item('launch_button_tooltip', default_value='stop brawlhalla')
-                    
-                    # Wait for game to start with timeout
-                    start_time = time.time()
-                    timeout = 60  # 60 seconds timeout
-                    
-                    while not window.running() and (time.time() - start_time) < timeout:
-                        time.sleep(0.5)
-                        
-                    if window.running():
-                        self.state['hwnd'] = window.find()
-                        dpg.configure_item('farm_status', label='brawlhalla started')
-                    else:
-                        dpg.configure_item('farm_status', label='brawlhalla failed to start (timeout)')
-                        dpg.configure_item('launch_button_tooltip', default_value='start brawlhalla')
-                        
-                except subprocess.TimeoutExpired:
-                    dpg.configure_item('farm_status', label='launch command timed out')
-                except Exception as e:
-                    logger.error(f"Error launching Brawlhalla: {e}")
-                    dpg.configure_item('farm_status', label='failed to launch brawlhalla')
-                    
+                self.launch_job.start()
+
         except Exception as e:
             logger.error(f"Error in launch_button: {e}")
-            dpg.configure_item('farm_status', label='launch error occurred')
+            self.ui.status('launch error occurred')
 
     # ---------------------------------------------------
 
@@ -235,6 +222,7 @@ class Callbacks:
             frequency = max(37, min(32767, frequency))  # Windows beep frequency limits
             duration = max(1, min(5000, duration))      # Reasonable duration limits
             
+            import winsound
             winsound.Beep(int(frequency), int(duration))
         except Exception as e:
             logger.error(f"Error playing beep sound: {e}")
@@ -242,21 +230,48 @@ class Callbacks:
     def beep_reset(self) -> None:
         """Reset beep settings to defaults."""
         try:
-            dpg.set_value('beep_frequency', 500)
-            dpg.set_value('beep_duration', 72)
+            dpg.set_value(WIDGET_TAGS['beep_frequency'], DEFAULT_CONFIG['beep_frequency'])
+            dpg.set_value(WIDGET_TAGS['beep_duration'], DEFAULT_CONFIG['beep_duration'])
         except Exception as e:
             logger.error(f"Error resetting beep settings: {e}")
 
     # ---------------------------------------------------
 
+    def hotkey_button(self, sender, app_data, user_data):
+        """Rebind the key setting in user_data to the next key pressed, esc cancels."""
+        dpg.configure_item(f'{user_data}_button', label='...', enabled=False)
+        thread = threading.Thread(target=self.hotkey_worker, args=(user_data,), daemon=True)
+        thread.start()
+
+    def hotkey_worker(self, key: str):
+        name = self.listener.hotkey()
+        with dpg.mutex():
+            dpg.set_frame_callback(
+                dpg.get_frame_count() + 1,
+                callback=self.hotkey_post,
+                user_data=(key, name.lower() if name else None)
+            )
+
+    def hotkey_post(self, sender, app_data, user_data):
+        key, name = user_data
+        if name:
+            dpg.set_value(WIDGET_TAGS[key], name)
+            # Swaps the snapshot right away, the debounced config write follows it
+            self.settings.update(key, name)
+        dpg.configure_item(f'{key}_button', label=getattr(self.settings.current, key), enabled=True)
+
+    # ---------------------------------------------------
+
     def mini_lobby_setup_start(self):
         self.state['hwnd'] = window.find()
         if self.state['hwnd']:
+            self.settings.capture()
             self.timer.start(0, ['lobby_setup_game_rules', 'lobby_setup_finish'])
 
     def full_lobby_setup_start(self):
         self.state['hwnd'] = window.find()
         if self.state['hwnd']:
+            self.settings.capture()
             self.timer.start(0, ['lobby_setup_game_rules', 'lobby_setup_lobby', 'lobby_setup_finish'])
 
     # ---------------------------------------------------
@@ -278,6 +293,7 @@ class Callbacks:
             )
 
     def update_post(self, sender, app_data, user_data):
+        import webbrowser
         message, is_update_available = user_data
         dpg.set_value('update_status_text', message)
         if is_update_available and self.update.release_url:
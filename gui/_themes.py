@@ -1,4 +1,3 @@
-from tkinter import W
 import dearpygui.dearpygui as dpg
 
 def create_fonts(main_font, icon_font):
@@ -1,10 +1,15 @@
 import dearpygui.dearpygui as dpg
-import webbrowser
 from gui._themes import create_themes, create_fonts
 from gui._callbacks import Callbacks
+from scripts.profiler import StartupProfiler
+from scripts.schema import widget
+
+def _open_url(address):
+    import webbrowser
+    webbrowser.open(address)
 
 class PrawlGUI:
-    def __init__(self, config, main_font, icon_font, timer, keyseq, state, update):
+    def __init__(self, config, main_font, icon_font, timer, keyseq, state, update, profiler=None):
 
         self.config = config
         self.timer = timer
@@ -14,16 +19,24 @@ class PrawlGUI:
         self.callbacks = Callbacks(self)
         self.timer.set_on_stop_callback(self.callbacks.on_timer_stopped)
 
+        profiler = profiler or StartupProfiler()
         dpg.create_context()
-        create_themes()
-        self.main_font, self.icon_font = create_fonts(main_font, icon_font)
-        self._create_widgets()
+        with profiler.phase('themes'):
+            create_themes()
+        with profiler.phase('fonts'):
+            self.main_font, self.icon_font = create_fonts(main_font, icon_font)
+        with profiler.phase('widgets'):
+            self._create_widgets()
+            self.timer.settings.bind_widgets()
+
+    def _lifetime_text(self, name):
+        return self.timer.stats.label(name) if self.timer.stats else f'total {name}'
 
     def _hyperlink(self, text, address):
         with dpg.group(horizontal=True):
             dpg.add_text(f'(', color=(100, 149, 238))
             dpg.bind_item_font(dpg.last_item(), self.icon_font)
-            dpg.add_button(label=text, callback=lambda: webbrowser.open(address))
+            dpg.add_button(label=text, callback=lambda: _open_url(address))
             dpg.bind_item_theme(dpg.last_item(), "__hyperlinkTheme")
 
     def _create_widgets(self):
@@ -37,7 +50,7 @@ class PrawlGUI:
                 with dpg.group(horizontal=True):
                     with dpg.group():
                         with dpg.group():
-                            dpg.add_slider_int(min_value=1, max_value=25, default_value=int(config.get('match_time', 25)), width=168, height=20, tag='match_time', callback=self.callbacks.match_time_slider)
+                            dpg.add_slider_int(**widget('match_time', config), width=168, height=20, callback=self.callbacks.match_time_slider)
                             with dpg.tooltip(dpg.last_item()): dpg.add_text('', tag='estimated_values');self.callbacks.update_values(None, config.get('match_time', 25))
                             dpg.add_spacer(height=0.5)
                             self.callbacks.update_slider_format(int(self.config.get('match_time', 25)))
@@ -62,13 +75,13 @@ class PrawlGUI:
                         with dpg.group(horizontal=True):
                             dpg.add_button(label=self.state['total_games'], width=20, height=20, tag='total_games')
                             dpg.bind_item_theme(dpg.last_item(), '__gameTextTheme')
-                            with dpg.tooltip(dpg.last_item()): dpg.add_text('total games')
+                            with dpg.tooltip(dpg.last_item()): dpg.add_text(self._lifetime_text('games'), tag='total_games_tooltip')
                             dpg.add_button(label=self.state['total_gold'], width=66, height=20, tag='total_gold')
                             dpg.bind_item_theme(dpg.last_item(), '__goldTextTheme')
-                            with dpg.tooltip(dpg.last_item()): dpg.add_text('total gold')
+                            with dpg.tooltip(dpg.last_item()): dpg.add_text(self._lifetime_text('gold'), tag='total_gold_tooltip')
                             dpg.add_button(label=self.state['total_exp'], width=66, height=20, tag='total_exp')
                             dpg.bind_item_theme(dpg.last_item(), '__expTextTheme')
-                            with dpg.tooltip(dpg.last_item()): dpg.add_text('total exp')
+                            with dpg.tooltip(dpg.last_item()): dpg.add_text(self._lifetime_text('exp'), tag='total_exp_tooltip')
 
                     # biiig button
                     dpg.add_button(label='â', tag='run_button', width=83, height=83, callback=self.callbacks.run_button)
@@ -97,46 +110,46 @@ class PrawlGUI:
                     # loop options
                     with dpg.tree_node(label='starting / restarting'):
                         dpg.add_spacer(height=0.5)
-                        dpg.add_text('spam amount'); dpg.add_slider_int(label='presses', min_value=0, max_value=20, default_value=int(config.get('game_start_spam', 12)), tag='start_spam')
+                        dpg.add_text('spam amount'); dpg.add_slider_int(label='presses', **widget('game_start_spam', config))
                         with dpg.tooltip(dpg.last_item()): dpg.add_text('how many times to press going through match result screen etc', wrap=190)
-                        dpg.add_text('match restart delay'); dpg.add_slider_int(label='seconds', min_value=0, max_value=30, default_value=int(config.get('game_restart_delay', 4)), tag='wait_restart')
+                        dpg.add_text('match restart delay'); dpg.add_slider_int(label='seconds', **widget('game_restart_delay', config))
                         with dpg.tooltip(dpg.last_item()): dpg.add_text('the time to wait after a match finishes before restarting', wrap=190)
-                        dpg.add_text('match load time'); dpg.add_slider_int(label='seconds', min_value=10, max_value=30, default_value=int(config.get('game_load_time', 15)), tag='wait_gameload')
+                        dpg.add_text('match load time'); dpg.add_slider_int(label='seconds', **widget('game_load_time', config))
                         with dpg.tooltip(dpg.last_item()): dpg.add_text('the time to wait for a match to start up to the countdown', wrap=190)
 
                     # dc rc options
                     dpg.add_spacer(height=0.5)
                     with dpg.tree_node(label='disconnect / reconnect'):
                         dpg.add_spacer(height=0.5); dpg.add_text('mode')
-                        dpg.add_checkbox(label='default', tag='open_menu_default', default_value=bool(config.get('open_menu_default', True)), callback=self.callbacks.select_open_menu_default)
+                        dpg.add_checkbox(label='default', **widget('open_menu_default', config), callback=self.callbacks.select_open_menu_default)
                         with dpg.tooltip(dpg.last_item()): dpg.add_text('default mode c:', wrap= 190)
                         dpg.add_spacer(height=0.5)
                         with dpg.group(horizontal=True):
-                            dpg.add_checkbox(label='+fix', tag='open_menu_fix', default_value=bool(config.get('open_menu_fix', False)), callback=self.callbacks.select_open_menu_fix)
+                            dpg.add_checkbox(label='+fix', **widget('open_menu_fix', config), callback=self.callbacks.select_open_menu_fix)
                             with dpg.tooltip(dpg.last_item()): dpg.add_text('tries to fix esc menu not opening', wrap= 190)
-                            dpg.add_checkbox(label='+fix2', tag='open_menu_fix2', default_value=bool(config.get('open_menu_fix2', False)), callback=self.callbacks.select_open_menu_fix2)
+                            dpg.add_checkbox(label='+fix2', **widget('open_menu_fix2', config), callback=self.callbacks.select_open_menu_fix2)
                             with dpg.tooltip(dpg.last_item()): dpg.add_text('tries the fix but 2 times', wrap= 190)
                         dpg.add_spacer(height=0.5)
-                        dpg.add_checkbox(label='hold to pause', tag='open_menu_hold', default_value=bool(config.get('open_menu_hold', False)), callback=self.callbacks.select_open_menu_hold)
+                        dpg.add_checkbox(label='hold to pause', **widget('open_menu_hold', config), callback=self.callbacks.select_open_menu_hold)
                         with dpg.tooltip(dpg.last_item()): dpg.add_text('must enable in brawlhalla: OPTIONS > SYSTEM SETTINGS > HOLD TO PAUSE', wrap=190)
                         dpg.add_spacer(height=0.5)
-                        dpg.add_checkbox(label='use ENTER key', tag='open_menu_enter', default_value=bool(config.get('open_menu_enter', True)))
+                        dpg.add_checkbox(label='use ENTER key', **widget('open_menu_enter', config))
                         with dpg.tooltip(dpg.last_item()): dpg.add_text('use ENTER key instead of ESC', wrap= 190)
                         dpg.add_spacer(height=0.5)
-                        dpg.add_text('menu key presses', tag='menu_key_presses_text'); dpg.add_slider_int(label='times', min_value=1, max_value=6, default_value=int(config.get('menu_key_presses', 2)), tag='menu_key_presses')
+                        dpg.add_text('menu key presses', tag='menu_key_presses_text'); dpg.add_slider_int(label='times', **widget('menu_key_presses', config))
                         with dpg.tooltip(dpg.last_item()): dpg.add_text('times to press the menu key (background key actions dont register so its defaut to twice, set to 1 when using direct input)', wrap= 190)
-                        dpg.add_text('key press delay', tag='menu_key_presses_delay_text'); dpg.add_slider_int(label='ms', min_value=0, max_value=1000, default_value=int(config.get('menu_key_presses_delay', 0)), tag='menu_key_presses_delay')
+                        dpg.add_text('key press delay', tag='menu_key_presses_delay_text'); dpg.add_slider_int(label='ms', **widget('menu_key_presses_delay', config))
                         with dpg.tooltip(dpg.last_item()): dpg.add_text('time to wait after each menu key press', wrap= 190)
-                        dpg.add_text('disconnect delay'); dpg.add_slider_int(label='ms', min_value=100, max_value=1000, default_value=int(config.get('disconnect_delay', 100)), tag='wait_disconnect')
+                        dpg.add_text('disconnect delay'); dpg.add_slider_int(label='ms', **widget('disconnect_delay', config))
                         with dpg.tooltip(dpg.last_item()): dpg.add_text('time to wait before switching to disconnect button (waiting for menu to pop up)', wrap= 190)
-                        dpg.add_text('reconnect delay'); dpg.add_slider_int(label='seconds', min_value=3, max_value=20, default_value=int(config.get('reconnect_delay', 4)), tag='wait_reconnect')
+                        dpg.add_text('reconnect delay'); dpg.add_slider_int(label='seconds', **widget('reconnect_delay', config))
                         with dpg.tooltip(dpg.last_item()): dpg.add_text('time to wait before reconnectng to the match', wrap= 190)
 
                     # input related
                     dpg.add_spacer(height=0.5)
                     with dpg.tree_node(label='input config'):
                         dpg.add_spacer(height=0.5)
-                        dpg.add_checkbox(label='direct input mode', tag='direct_input', default_value=bool(config.get('direct_input', False)))
+                        dpg.add_checkbox(label='direct input mode', **widget('direct_input', config))
                         with dpg.tooltip(dpg.last_item()): dpg.add_text('will not work in the background! try this if you are experiencing issues with inputs, and set the menu key presses to 1', wrap= 190)
                         dpg.add_spacer(height=0.5)
                         with dpg.group(horizontal=True):
@@ -161,19 +174,19 @@ class PrawlGUI:
                             with dpg.tooltip(dpg.last_item()): dpg.add_text('change heavy attack key', tag='key_heavy_tooltip_text')
 
                             # storing values like this im too sleepy
-                            dpg.add_text(default_value=config.get('key_up', 'up'), tag='key_up', show=False)
-                            dpg.add_text(default_value=config.get('key_left', 'left'), tag='key_down', show=False)
-                            dpg.add_text(default_value=config.get('key_down', 'down'), tag='key_left', show=False)
-                            dpg.add_text(default_value=config.get('key_right', 'right'), tag='key_right', show=False)
-                            dpg.add_text(default_value=config.get('key_throw', 'v'), tag='key_throw', show=False)
-                            dpg.add_text(default_value=config.get('key_light', 'c'), tag='key_light', show=False)
-                            dpg.add_text(default_value=config.get('key_heavy', 'x'), tag='key_heavy', show=False)
+                            dpg.add_text(**widget('key_up', config), show=False)
+                            dpg.add_text(**widget('key_left', config), show=False)
+                            dpg.add_text(**widget('key_down', config), show=False)
+                            dpg.add_text(**widget('key_right', config), show=False)
+                            dpg.add_text(**widget('key_throw', config), show=False)
+                            dpg.add_text(**widget('key_light', config), show=False)
+                            dpg.add_text(**widget('key_heavy', config), show=False)
 
 
                         dpg.add_spacer(height=0.5)
-                        dpg.add_text('hold'); dpg.add_slider_int(label='ms', min_value=0, max_value=300, default_value=int(config.get('keypress_hold', 70)), tag='keypress_hold')
+                        dpg.add_text('hold'); dpg.add_slider_int(label='ms', **widget('keypress_hold', config))
                         with dpg.tooltip(dpg.last_item()): dpg.add_text('average hold duration of the key', wrap= 190)
-                        dpg.add_text('delay'); dpg.add_slider_int(label='ms', min_value=0, max_value=500, default_value=int(config.get('keypress_delay', 150)), tag='keypress_delay')
+                        dpg.add_text('delay'); dpg.add_slider_int(label='ms', **widget('keypress_delay', config))
                         with dpg.tooltip(dpg.last_item()): dpg.add_text('time to wait before any new key is pressed in sequence', wrap= 190)
                     dpg.add_spacer(height=0.5)
                     with dpg.group(horizontal=True, show=False):
@@ -187,7 +200,7 @@ class PrawlGUI:
                 with dpg.collapsing_header(label='boop beep?', bullet=True):
                     dpg.add_spacer(height=0.5)
                     with dpg.group(horizontal=True):
-                        dpg.add_checkbox(label='timer sound', tag='timer_sound', default_value=bool(config.get('timer_sound', False)))
+                        dpg.add_checkbox(label='timer sound', **widget('timer_sound', config))
                         with dpg.tooltip(dpg.last_item()): dpg.add_text('plays a sound after the timer ends', wrap= 190)
                         dpg.add_button(label='Ù', callback=self.callbacks.beep_sound)
                         dpg.bind_item_font(dpg.last_item(), self.icon_font)
@@ -195,33 +208,42 @@ class PrawlGUI:
                         dpg.add_button(label='W', callback=self.callbacks.beep_reset)
                         dpg.bind_item_font(dpg.last_item(), self.icon_font)
                         with dpg.tooltip(dpg.last_item()): dpg.add_text('reset')
-                    dpg.add_text('beep frequency'); dpg.add_slider_int(label='hz', min_value=100, max_value=2000, default_value=int(config.get('beep_frequency', 500)), tag='beep_frequency')
-                    dpg.add_text('beep duration'); dpg.add_slider_int(label='ms', min_value=10, max_value=1000, default_value=int(config.get('beep_duration', 72)), tag='beep_duration')
+                    dpg.add_text('beep frequency'); dpg.add_slider_int(label='hz', **widget('beep_frequency', config))
+                    dpg.add_text('beep duration'); dpg.add_slider_int(label='ms', **widget('beep_duration', config))
                     dpg.add_spacer(height=0.5)
 
                 # other things
                 with dpg.collapsing_header(label='other', bullet=True):
                     dpg.add_spacer(height=0.5)
-                    dpg.add_checkbox(label='always on top', tag='always_on_top', default_value=bool(config.get('always_on_top', True)), callback=self.callbacks.update_aot)
+                    dpg.add_checkbox(label='always on top', **widget('always_on_top', config), callback=self.callbacks.update_aot)
                     with dpg.tooltip(dpg.last_item()): dpg.add_text('makes this window stay on top')
                     dpg.add_spacer(height=0.5)
-                    dpg.add_checkbox(label='launch brawlhalla with prawl', tag='auto_launch', default_value=bool(config.get('auto_launch', False)))
+                    dpg.add_checkbox(label='launch brawlhalla with prawl', **widget('auto_launch', config))
                     with dpg.tooltip(dpg.last_item()): dpg.add_text('launches brawlhalla when you launch prawl')
                     dpg.add_spacer(height=0.5)
-                    dpg.add_checkbox(label='rate limit detection', tag='rate_limit_detect', default_value=bool(config.get('rate_limit_detect', True)))
+                    dpg.add_checkbox(label='rate limit detection', **widget('rate_limit_detect', config))
                     with dpg.tooltip(dpg.last_item()): dpg.add_text('detects if you are rate limited in exp/gold')
                     dpg.add_spacer(height=0.5)
-                    dpg.add_checkbox(label='rate limit auto wait', tag='rate_limit_wait', default_value=bool(config.get('rate_limit_wait', True)))
+                    dpg.add_checkbox(label='rate limit auto wait', **widget('rate_limit_wait', config))
                     with dpg.tooltip(dpg.last_item()): dpg.add_text('waits for rate limit reset and starts farming')
                     dpg.add_spacer(height=0.5)
-                    dpg.add_slider_int(label='mins', min_value=30, max_value=60, default_value=int(config.get('rate_limit_wait_time', 45)), tag='rate_limit_wait_time')
+                    dpg.add_slider_int(label='mins', **widget('rate_limit_wait_time', config))
                     with dpg.tooltip(dpg.last_item()): dpg.add_text('time to wait for rate limit to reset')
                     dpg.add_spacer(height=0.5)
-                    dpg.add_checkbox(label='max games', tag='max_games', default_value=bool(config.get('max_games', False)))
+                    dpg.add_checkbox(label='max games', **widget('max_games', config))
                     with dpg.tooltip(dpg.last_item()): dpg.add_text('stops after set amount of games')
                     dpg.add_spacer(height=0.5)
-                    dpg.add_slider_int(label='games', min_value=1, max_value=99, default_value=int(config.get('max_games_amount', 16)), tag='max_games_amount')
+                    dpg.add_slider_int(label='games', **widget('max_games_amount', config))
                     with dpg.tooltip(dpg.last_item()): dpg.add_text('the amount of games to stop at')
+                    dpg.add_spacer(height=0.5)
+                    dpg.add_checkbox(label='pixel search', **widget('pixel_search', config))
+                    with dpg.tooltip(dpg.last_item()): dpg.add_text('ends waits as soon as the game screen appears\n(needs templates in res/screens)')
+                    dpg.add_spacer(height=0.5)
+                    dpg.add_checkbox(label='adaptive waits', **widget('adaptive_waits', config))
+                    with dpg.tooltip(dpg.last_item()): dpg.add_text('caps load/restart/reconnect waits at what\npixel search has measured (needs pixel search,\nsliders are the maximum)')
+                    dpg.add_spacer(height=0.5)
+                    dpg.add_checkbox(label='auto match time', **widget('auto_match_time', config))
+                    with dpg.tooltip(dpg.last_item()): dpg.add_text('picks the match time with the most exp/hour\nand changes it in game rules between games')
 
                 dpg.add_spacer(height=0.5)
                 with dpg.group(horizontal=True):
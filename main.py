@@ -1,15 +1,22 @@
+import time
+_STARTED = time.perf_counter()
+
 import sys
+import argparse
 import logging
-import dearpygui.dearpygui as dpg
-import pywinstyles
-import scripts.window as window
+import threading
+import importlib.util
 from scripts.config import Config, get_platform
 from scripts.input import KeySequence
 from scripts.timer import Timer
-from scripts.update import Update
-from scripts._direct import Keyboard
-from scripts.constants import WINDOW_TITLE, MIN_WINDOW_WIDTH, MIN_WINDOW_HEIGHT
-from gui.gui import PrawlGUI
+from scripts.ui import UIQueue
+from scripts.settings import SettingsStore
+from scripts.backends import MessageBackend, SendInputBackend
+from scripts.profiler import StartupProfiler
+from scripts.stats import StatsStore
+from scripts.waits import WaitHistory
+from scripts.sequences import SequenceSource
+from scripts.constants import ANALYTICS_MIN_CYCLES, WINDOW_TITLE, MIN_WINDOW_WIDTH, MIN_WINDOW_HEIGHT
 
 # Set up logging
 logging.basicConfig(
@@ -18,15 +25,13 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-def check_dependencies():
+def check_dependencies(required_modules=('dearpygui', 'win32api', 'win32gui', 'requests')):
     """Check if all required dependencies are available."""
-    required_modules = ['dearpygui', 'win32api', 'win32gui', 'requests']
     missing_modules = []
     
+    # find_spec locates modules without importing (and paying for) them
     for module in required_modules:
-        try:
-            __import__(module)
-        except ImportError:
+        if importlib.util.find_spec(module) is None:
             missing_modules.append(module)
     
     if missing_modules:
@@ -38,8 +43,68 @@ def check_dependencies():
     
     return True
 
-def main():
+def parse_args(argv=None) -> argparse.Namespace:
+    """Parse command line flags."""
+    parser = argparse.ArgumentParser(prog='prawl', description='brawlhalla gold and exp farming timer')
+    parser.add_argument('--headless', action='store_true', help='run the farming loop without the gui, using config.ini')
+    parser.add_argument('--minutes', type=int, help='match time in minutes (headless, overrides config)')
+    parser.add_argument('--max-games', type=int, help='stop after this many games (headless, overrides config)')
+    parser.add_argument('--direct-input', action='store_true', help='use direct input mode (headless)')
+    parser.add_argument('--launch', action='store_true', help='launch brawlhalla if it is not running (headless)')
+    parser.add_argument('--log-file', help='also write status to this file (headless)')
+    parser.add_argument('--profile-startup', action='store_true', help='print a per-phase startup timing breakdown')
+    return parser.parse_args(argv)
+
+def watch_pixel_search(config: Config, settings: SettingsStore, keyseq: KeySequence, timer: Timer) -> None:
+    """
+    Build the detector and reward reader the first time pixel search is on,
+    so switching it on in the gui works without a restart.
+
+    Args:
+        config: Configuration with the template folders
+        settings: Settings store to watch
+        keyseq: KeySequence that gets the detector
+        timer: Timer that gets the reward reader
+    """
+    lock = threading.Lock()
+
+    def build() -> None:
+        with lock:
+            if keyseq.detector:
+                return
+            # NumPy and the templates are only loaded once pixel search is used
+            from scripts.detect import Detector
+            from scripts.rewards import RewardReader
+            rewards = RewardReader(config.glyphs_dir)
+            timer.rewards = rewards if rewards.available else None
+            keyseq.detector = Detector(config.screens_dir)
+
+    def changed(key, value) -> None:
+        if key == 'pixel_search' and value and not keyseq.detector:
+            threading.Thread(target=build, name='PixelSearch', daemon=True).start()
+
+    settings.subscribe(changed)
+    if settings.current.pixel_search:
+        build()
+
+def main(argv=None):
     """Main application entry point."""
+    args = parse_args(argv)
+    if args.headless:
+        from scripts.headless import run
+        return run(args)
+    profiler = StartupProfiler(args.profile_startup, origin=_STARTED)
+    profiler.add('import', time.perf_counter() - _STARTED)
+    return run_gui(profiler)
+
+def run_gui(profiler: StartupProfiler):
+    """Run the application with the DearPyGui interface."""
+    with profiler.phase('import (gui)'):
+        import dearpygui.dearpygui as dpg
+        import pywinstyles
+        from scripts.update import Update
+        from gui.gui import PrawlGUI
+
     try:
         # Check platform compatibility
         platform = get_platform()
@@ -60,25 +125,47 @@ def main():
         
         # Initialize core components
         logger.info("Initializing configuration...")
-        config = Config()
-        
-        logger.info("Initializing keyboard interface...")
-        keyboard = Keyboard()
-        
-        logger.info("Initializing input sequences...")
-        keyseq = KeySequence(config.data, keyboard)
-        
-        logger.info("Initializing timer...")
-        timer = Timer(config.data, keyseq, state)
+        with profiler.phase('config'):
+            config = Config()
+            settings = SettingsStore(config.data)
+            config.watch(settings)
+            stats = StatsStore(config.stats_file)
+            waits = WaitHistory(config.waits_file)
+
+        # NumPy is only imported once there is enough history to measure
+        if stats.count >= ANALYTICS_MIN_CYCLES:
+            with profiler.phase('history'):
+                from scripts.analytics import apply_measured_rates
+                apply_measured_rates(config.stats_file)
         
-        logger.info("Initializing update checker...")
-        update = Update(config.version)
+        with profiler.phase('core'):
+            ui = UIQueue()
+
+            logger.info("Initializing keyboard interface...")
+            # ctypes/user32 setup is only paid for by the gui, not by --headless or --help
+            from scripts._direct import Keyboard
+            keyboard = Keyboard()
+            
+            logger.info("Initializing input sequences...")
+            keyseq = KeySequence(settings, MessageBackend(keyboard.keys), SendInputBackend(keyboard), ui,
+                                 sequences=SequenceSource(config.sequences_file),
+                                 waits=waits)
+            
+            logger.info("Initializing timer...")
+            timer = Timer(settings, keyseq, state, ui, stats)
+            
+            logger.info("Initializing update checker...")
+            update = Update(config.version)
+
+        with profiler.phase('pixel search'):
+            watch_pixel_search(config, settings, keyseq, timer)
 
         # Setup GUI
         logger.info("Initializing GUI...")
-        gui = PrawlGUI(config.data, config.main_font, config.icon_font, timer, keyseq, state, update)
+        gui = PrawlGUI(config.data, config.main_font, config.icon_font, timer, keyseq, state, update, profiler)
         
         # Create viewport with constants
+        viewport_start = time.perf_counter()
         dpg.create_viewport(
             title=WINDOW_TITLE,
             min_width=MIN_WINDOW_WIDTH,
@@ -104,16 +191,26 @@ def main():
             pywinstyles.change_title_color(None, '#c0c3c7')
         except Exception as e:
             logger.warning(f"Could not apply window styling: {e}")
+        profiler.add('viewport', time.perf_counter() - viewport_start)
 
         # Auto-launch if configured
         if config.data.get('auto_launch', False):
             try:
-                gui._launch_callback()
+                gui.callbacks.launch_button()
             except Exception as e:
                 logger.error(f"Auto-launch failed: {e}")
 
         logger.info("Starting application...")
-        dpg.start_dearpygui()
+        # Manual render loop: apply queued UI updates from worker threads once per frame
+        with profiler.phase('first frame'):
+            ui.drain()
+            dpg.render_dearpygui_frame()
+        if profiler.enabled:
+            print(profiler.report())
+
+        while dpg.is_dearpygui_running():
+            ui.drain()
+            dpg.render_dearpygui_frame()
 
     except Exception as e:
         logger.error(f"Critical error during startup: {e}")
@@ -124,8 +221,11 @@ def main():
         try:
             logger.info("Saving configuration...")
             config.save()
+            stats.close()
+            waits.save()
             
             # Restore window if hidden
+            import scripts.window as window
             hwnd = window.find()
             if hwnd:
                 window.show(hwnd)
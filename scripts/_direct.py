@@ -1,11 +1,10 @@
-import time
-import random
-import win32con
 import ctypes
-from ctypes import Structure, c_long, c_ulong, sizeof, POINTER, pointer, byref, c_ushort
-from typing import Union, List
+from ctypes import wintypes
+from ctypes import Structure, c_long, c_ulong, c_short, sizeof, POINTER, pointer, byref, c_ushort
+from typing import Union, List, Iterable, Tuple, Dict, Optional
 import logging
-from scripts.constants import RANDOM_VARIATION_FACTOR
+from scripts.clock import Clock, CLOCK
+from scripts.constants import RANDOM_VARIATION_FACTOR, VK_CODES
 
 logger = logging.getLogger(__name__)
 
@@ -13,6 +12,9 @@ logger = logging.getLogger(__name__)
 INPUT_KEYBOARD = 1        # keyboard input mode
 KEYEVENTF_KEYUP = 0x0002   # key release
 
+# Timed key event for batched submission: (offset in seconds, key, is key up)
+KeyEvent = Tuple[float, Union[str, int], bool]
+
 # Input structures for Windows API
 class MOUSEINPUT(Structure):
     """Structure for mouse input events."""
@@ -49,6 +51,119 @@ class INPUT(Structure):
         ('union', _INPUTunion)
     ]
 
+class KeyTable:
+    """
+    Per-layout cache of resolved keys.
+    Each key is resolved once to a (virtual key, scan code) pair and gets a
+    prebuilt pair of down/up INPUT records that are reused for every event.
+    """
+
+    def __init__(self, user32, key_mapping: Dict[str, int]):
+        self.user32 = user32
+        # HKL is pointer sized, the default c_int restype truncates it on 64-bit Python
+        self.user32.GetKeyboardLayout.argtypes = [wintypes.DWORD]
+        self.user32.GetKeyboardLayout.restype = wintypes.HKL
+        self.user32.VkKeyScanExW.argtypes = [wintypes.WCHAR, wintypes.HKL]
+        self.user32.VkKeyScanExW.restype = c_short
+        self.user32.MapVirtualKeyExW.argtypes = [wintypes.UINT, wintypes.UINT, wintypes.HKL]
+        self.user32.MapVirtualKeyExW.restype = wintypes.UINT
+        self.key_mapping = key_mapping
+        self.layout: Optional[int] = None
+        self._codes: Dict[Union[str, int], Tuple[int, int]] = {}
+        self._inputs: Dict[Union[str, int], Tuple[INPUT, INPUT]] = {}
+        # Shared by every record, SendInput only passes it through
+        self._extra_info = pointer(c_ulong(0))
+        self.refresh()
+
+    def refresh(self) -> bool:
+        """
+        Drop resolved keys if the keyboard layout changed since the last check.
+
+        Returns:
+            True if the cache was invalidated, False otherwise
+        """
+        layout = self.user32.GetKeyboardLayout(0)
+        if layout == self.layout:
+            return False
+        if self.layout is not None:
+            logger.info("Keyboard layout changed, re-resolving keys")
+        self.layout = layout
+        self._codes.clear()
+        self._inputs.clear()
+        return True
+
+    def prepare(self, keys: Iterable[Union[str, int]]) -> None:
+        """
+        Resolve and prebuild records for the given keys ahead of time.
+        Keys that can't be resolved are logged and skipped, pressing them
+        fails on its own later.
+
+        Args:
+            keys: Keys that are about to be used
+        """
+        for key in keys:
+            try:
+                self.inputs(key)
+            except ValueError as e:
+                logger.error(f"Skipping key: {e}")
+
+    def resolve(self, key: Union[str, int]) -> Tuple[int, int]:
+        """
+        Resolve a key to its virtual key code and scan code.
+
+        Args:
+            key: Key name, single character or virtual key code
+
+        Returns:
+            (virtual key code, scan code) for the current layout
+
+        Raises:
+            ValueError: If the key is neither a known name, a single character nor a code
+        """
+        codes = self._codes.get(key)
+        if codes is None:
+            if isinstance(key, str) and key.lower() in self.key_mapping:
+                vk_code = self.key_mapping[key.lower()]
+            elif isinstance(key, str) and len(key) == 1:
+                scan = self.user32.VkKeyScanExW(key, self.layout)
+                vk_code = scan & 0xFF if scan != -1 else ord(key.upper())
+            elif isinstance(key, int):
+                vk_code = key
+            else:
+                raise ValueError(f"Unknown key: {key!r}")
+            scan_code = self.user32.MapVirtualKeyExW(vk_code, 0, self.layout)
+            codes = self._codes[key] = (vk_code, scan_code)
+        return codes
+
+    def inputs(self, key: Union[str, int]) -> Tuple[INPUT, INPUT]:
+        """
+        Get the prebuilt (down, up) INPUT records for a key.
+
+        Args:
+            key: Key name, single character or virtual key code
+
+        Returns:
+            Tuple of key down and key up records
+        """
+        records = self._inputs.get(key)
+        if records is None:
+            vk_code, scan_code = self.resolve(key)
+            records = self._inputs[key] = (
+                self._build(vk_code, scan_code, 0),
+                self._build(vk_code, scan_code, KEYEVENTF_KEYUP),
+            )
+        return records
+
+    def _build(self, vk_code: int, scan_code: int, flags: int) -> INPUT:
+        inp = INPUT()
+        inp.type = INPUT_KEYBOARD
+        inp.union.ki.wVk = vk_code
+        inp.union.ki.wScan = scan_code
+        inp.union.ki.dwFlags = flags
+        inp.union.ki.time = 0
+        inp.union.ki.dwExtraInfo = self._extra_info
+        return inp
+
 # Keyboard input emulation using Windows API
 class Keyboard:
     """
@@ -56,7 +171,8 @@ class Keyboard:
     Provides methods for pressing keys, combinations, and sequences.
     """
     
-    def __init__(self):
+    def __init__(self, clock: Clock = CLOCK):
+        self.clock = clock
         # Load user32.dll to access Windows UI functions
         try:
             self.user32 = ctypes.windll.user32
@@ -64,61 +180,23 @@ class Keyboard:
             logger.error(f"Failed to load user32.dll: {e}")
             raise
 
-        # Key mappings for special keys
-        self.key_mapping = {
-            'shift': win32con.VK_SHIFT,
-            'enter': win32con.VK_RETURN,
-            'space': win32con.VK_SPACE,
-            'tab': win32con.VK_TAB,
-            'backspace': win32con.VK_BACK,
-            'escape': win32con.VK_ESCAPE,
-            'up': win32con.VK_UP,
-            'down': win32con.VK_DOWN,
-            'left': win32con.VK_LEFT,
-            'right': win32con.VK_RIGHT,
-        }
-
-        # Add number keys (0-9)
-        for i in range(10):
-            self.key_mapping[str(i)] = ord(str(i))
-
-        # Add letter keys (a-z)
-        for c in 'abcdefghijklmnopqrstuvwxyz':
-            self.key_mapping[c] = ord(c.upper())
+        # Key names shared with KeyListener, so rebound keys always resolve
+        self.key_mapping = dict(VK_CODES)
+
+        self.keys = KeyTable(self.user32, self.key_mapping)
 
     def _create_input(self, key: Union[str, int], key_up: bool = False) -> INPUT:
         """
-        Create Windows INPUT structure for keyboard event.
+        Get the Windows INPUT structure for a keyboard event.
         
         Args:
             key: Key to create input for (string or virtual key code)
             key_up: Whether this is a key release event
             
         Returns:
-            Windows INPUT structure
+            Prebuilt INPUT structure from the key table
         """
-        inp = INPUT()
-        inp.type = INPUT_KEYBOARD
-
-        # Determine virtual key code
-        if isinstance(key, str) and len(key) == 1:
-            vk_code = ord(key.upper())
-        elif isinstance(key, str) and key.lower() in self.key_mapping:
-            vk_code = self.key_mapping[key.lower()]
-        else:
-            vk_code = key
-
-        # Get scan code from virtual key code
-        scan_code = self.user32.MapVirtualKeyW(vk_code, 0)
-        
-        # Set up keyboard input structure
-        inp.union.ki.wVk = vk_code
-        inp.union.ki.wScan = scan_code
-        inp.union.ki.dwFlags = KEYEVENTF_KEYUP if key_up else 0
-        inp.union.ki.time = 0
-        inp.union.ki.dwExtraInfo = pointer(c_ulong(0))
-        
-        return inp
+        return self.keys.inputs(key)[key_up]
 
     def press(self, key: Union[str, int]) -> bool:
         """
@@ -170,7 +248,7 @@ class Keyboard:
         try:
             # Add random variation to hold time
             variation = RANDOM_VARIATION_FACTOR
-            hold_time = random.uniform(
+            hold_time = self.clock.uniform(
                 hold * (1 - variation) / 1000, 
                 hold * (1 + variation) / 1000
             )
@@ -178,13 +256,53 @@ class Keyboard:
             if not self.press(key):
                 return False
                 
-            time.sleep(hold_time)
+            self.clock.sleep(hold_time)
             return self.release(key)
             
         except Exception as e:
             logger.error(f"Error in keypress for {key}: {e}")
             return False
 
+    def send_batch(self, events: Iterable[KeyEvent]) -> int:
+        """
+        Submit a timed chunk of key events.
+
+        Events sharing the same offset are packed into one INPUT array and
+        injected with a single SendInput call, so the keys of a chord land
+        together instead of one syscall (and one sleep) apart.
+
+        Args:
+            events: (offset in seconds from the start of the batch, key, key_up) tuples
+
+        Returns:
+            Number of events actually injected
+        """
+        injected = 0
+        try:
+            groups: List[Tuple[float, List[INPUT]]] = []
+            for offset, key, key_up in sorted(events, key=lambda e: e[0]):
+                inp = self._create_input(key, key_up)
+                if groups and groups[-1][0] == offset:
+                    groups[-1][1].append(inp)
+                else:
+                    groups.append((offset, [inp]))
+
+            clock = self.clock
+            start = clock.perf_counter()
+            for offset, inputs in groups:
+                remaining = start + offset - clock.perf_counter()
+                if remaining > 0:
+                    clock.sleep(remaining)
+                count = len(inputs)
+                array = (INPUT * count)(*inputs)
+                sent = self.user32.SendInput(count, array, sizeof(INPUT))
+                if sent != count:
+                    logger.warning(f"SendInput injected {sent} of {count} events")
+                injected += sent
+        except Exception as e:
+            logger.error(f"Error sending input batch: {e}")
+        return injected
+
     def combo(self, keys: List[Union[str, int]], hold: int = 80) -> bool:
         """
         Perform a key combination (press all keys, hold, then release all).
@@ -196,32 +314,21 @@ class Keyboard:
         Returns:
             True if successful, False otherwise
         """
+        variation = RANDOM_VARIATION_FACTOR
+        hold_time = self.clock.uniform(
+            hold * (1 - variation) / 1000, 
+            hold * (1 + variation) / 1000
+        )
+        pressed = released = 0
         try:
-            # Press all keys in sequence
-            for i, key in enumerate(keys):
-                if not self.press(key):
-                    # Clean up - release any keys that were pressed
-                    for pressed_key in keys[:i]:
-                        self.release(pressed_key)
-                    return False
-                time.sleep(random.uniform(0.01, 0.02))
-            
-            # Hold the combination
-            variation = RANDOM_VARIATION_FACTOR
-            hold_time = random.uniform(
-                hold * (1 - variation) / 1000, 
-                hold * (1 + variation) / 1000
-            )
-            time.sleep(hold_time)
-            
-            # Release all keys in reverse order
-            for key in reversed(keys):
-                if not self.release(key):
-                    logger.warning(f"Failed to release key {key} in combo")
-                time.sleep(random.uniform(0.01, 0.02))
-                
-            return True
-            
-        except Exception as e:
-            logger.error(f"Error in key combo {keys}: {e}")
+            pressed = self.send_batch([(0.0, key, False) for key in keys])
+            if pressed == len(keys):
+                self.clock.sleep(hold_time)
+        finally:
+            # SendInput injects in order, so exactly the first `pressed` keys are down
+            if pressed:
+                released = self.send_batch([(0.0, key, True) for key in reversed(keys[:pressed])])
+        if pressed != len(keys) or released != pressed:
+            logger.warning(f"Key combo {keys}: pressed {pressed}, released {released} of {len(keys)} keys")
             return False
+        return True
@@ -0,0 +1,184 @@
+"""
+Columnar analytics over the cycle history in stats.dat.
+The log is read straight into a NumPy structured array, every statistic is
+a vectorised reduction over its columns, so months of history stay cheap.
+"""
+
+import struct
+import logging
+from typing import Dict, Optional, Tuple
+import numpy as np
+from scripts.stats import HEADER, RECORD, VERSION, VARIANTS, OUTCOMES, FLAG_MEASURED
+from scripts.constants import ANALYTICS_MIN_CYCLES
+
+logger = logging.getLogger(__name__)
+
+# Mirrors scripts.stats.RECORD
+RECORD_DTYPE = np.dtype([
+    ('timestamp', '<f8'),
+    ('duration', '<f4'),
+    ('cycle', '<f4'),
+    ('gold', '<f4'),
+    ('exp', '<f4'),
+    ('variant', 'u1'),
+    ('outcome', 'u1'),
+    ('flags', 'u1'),
+    ('pad', 'V1'),
+])
+assert RECORD_DTYPE.itemsize == RECORD.size
+
+SECONDS_PER_DAY = 86400
+
+def apply_measured_rates(filepath: str) -> 'History':
+    """
+    Load the history and switch the timer's estimates to the rates of the
+    cycles whose rewards were read from the reward screen.
+
+    Args:
+        filepath: Path to stats.dat
+
+    Returns:
+        The loaded History
+    """
+    from scripts.timer import set_rates
+
+    history = History.load(filepath)
+    rates = history.per_match_minute()
+    if rates:
+        set_rates(rates['exp'], rates['gold'])
+    return history
+
+class History:
+    """Cycle history as columns, oldest first."""
+
+    def __init__(self, records: np.ndarray):
+        order = np.argsort(records['timestamp'], kind='stable')
+        records = records[order]
+        self.timestamp = records['timestamp']
+        self.duration = records['duration'].astype(np.float64)
+        self.gold = records['gold'].astype(np.float64)
+        self.exp = records['exp'].astype(np.float64)
+        self.variant = records['variant']
+        self.outcome = records['outcome']
+        # Cycles whose rewards were read from the reward screen, the rest hold the timer's estimates
+        self.measured = (records['flags'] & FLAG_MEASURED).astype(bool)
+        # Measured wall-clock time of each cycle: inputs, loading, the match and rate limit waits
+        self.cycle_time = records['cycle'].astype(np.float64)
+
+    @classmethod
+    def load(cls, filepath: str) -> 'History':
+        """
+        Read a stats log written by StatsStore.
+
+        Args:
+            filepath: Path to stats.dat
+
+        Returns:
+            History instance, empty if the file is missing or unreadable
+        """
+        try:
+            with open(filepath, 'rb') as f:
+                _, version, _, count = HEADER.unpack(f.read(HEADER.size))[:4]
+                if version != VERSION:
+                    raise ValueError(f"unsupported stats file version {version}")
+                records = np.fromfile(f, dtype=RECORD_DTYPE, count=count)
+        except (OSError, ValueError, IndexError, struct.error) as e:
+            logger.warning(f"Could not load stats history: {e}")
+            records = np.zeros(0, dtype=RECORD_DTYPE)
+        return cls(records)
+
+    def __len__(self) -> int:
+        return len(self.timestamp)
+
+    def per_hour(self) -> Dict[str, float]:
+        """
+        Measured throughput over wall-clock farming time.
+
+        Returns:
+            Dictionary with gold and exp per hour
+        """
+        hours = self.cycle_time.sum() / 3600
+        if hours <= 0:
+            return {'gold': 0.0, 'exp': 0.0}
+        return {'gold': float(self.gold.sum() / hours), 'exp': float(self.exp.sum() / hours)}
+
+    def per_match_minute(self) -> Optional[Dict[str, float]]:
+        """
+        Measured gold and exp per minute of match time, the unit the timer estimates in.
+        Only cycles whose rewards were read count, estimated cycles would just
+        return the timer's own ratios.
+
+        Returns:
+            Dictionary with gold and exp per minute, None if there are too few measured cycles
+        """
+        measured = self.measured
+        minutes = self.duration[measured].sum() / 60
+        if np.count_nonzero(measured) < ANALYTICS_MIN_CYCLES or minutes <= 0:
+            return None
+        return {'gold': float(self.gold[measured].sum() / minutes), 'exp': float(self.exp[measured].sum() / minutes)}
+
+    def rate_limit_frequency(self) -> float:
+        """
+        Fraction of cycles that ended on the exp rate limit.
+
+        Returns:
+            Value between 0 and 1
+        """
+        if not len(self):
+            return 0.0
+        return float(np.count_nonzero(self.outcome == OUTCOMES.index('rate_limit')) / len(self))
+
+    def cycle_percentiles(self, percentiles: Tuple[float, ...] = (50, 90, 99)) -> Dict[int, float]:
+        """
+        Percentiles of the wall-clock cycle time.
+
+        Args:
+            percentiles: Percentiles to compute
+
+        Returns:
+            Dictionary of percentile -> seconds
+        """
+        if not len(self):
+            return {int(p): 0.0 for p in percentiles}
+        values = np.percentile(self.cycle_time, percentiles)
+        return {int(p): float(v) for p, v in zip(percentiles, values)}
+
+    def variant_counts(self) -> Dict[str, int]:
+        """Number of cycles run with each sequence variant."""
+        counts = np.bincount(self.variant, minlength=len(VARIANTS))
+        return {name: int(count) for name, count in zip(VARIANTS, counts)}
+
+    def daily(self, utc_offset: float = 0.0) -> np.ndarray:
+        """
+        Per-day rollup.
+
+        Args:
+            utc_offset: Seconds added to timestamps before splitting into days
+
+        Returns:
+            Structured array with day (days since epoch), games, gold, exp and hours
+        """
+        days = ((self.timestamp + utc_offset) // SECONDS_PER_DAY).astype(np.int64)
+        unique, index = np.unique(days, return_inverse=True)
+        rollup = np.zeros(len(unique), dtype=[('day', '<i8'), ('games', '<i8'),
+                                              ('gold', '<f8'), ('exp', '<f8'), ('hours', '<f8')])
+        rollup['day'] = unique
+        rollup['games'] = np.bincount(index, minlength=len(unique))
+        rollup['gold'] = np.bincount(index, weights=self.gold, minlength=len(unique))
+        rollup['exp'] = np.bincount(index, weights=self.exp, minlength=len(unique))
+        rollup['hours'] = np.bincount(index, weights=self.cycle_time, minlength=len(unique)) / 3600
+        return rollup
+
+    def summary(self) -> Dict[str, object]:
+        """
+        Headline numbers for the whole history.
+
+        Returns:
+            Dictionary with games, per-hour rates, rate limit frequency and cycle percentiles
+        """
+        return {
+            'games': len(self),
+            'per_hour': self.per_hour(),
+            'rate_limit_frequency': self.rate_limit_frequency(),
+            'cycle_time': self.cycle_percentiles(),
+        }
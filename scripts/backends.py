@@ -0,0 +1,188 @@
+"""
+Input backends used by KeySequence to deliver key events.
+Windows modules are imported lazily so the input engine can be loaded
+(and driven through RecordingBackend) on machines without pywin32.
+"""
+
+import statistics
+import logging
+from array import array
+from typing import Union, List, Dict, Iterable, Iterator, Optional, Tuple, Any
+from scripts.clock import Clock, CLOCK
+from scripts.constants import RANDOM_VARIATION_FACTOR
+
+logger = logging.getLogger(__name__)
+
+Key = Union[str, int]
+
+class InputBackend:
+    """Base class for keyboard input backends."""
+
+    name = 'base'
+
+    def refresh(self) -> None:
+        """Revalidate cached key data (called once per action run)."""
+
+    def prepare(self, keys: Iterable[Key]) -> None:
+        """
+        Resolve keys ahead of time so the first press pays no lookup cost.
+
+        Args:
+            keys: Keys that are about to be used
+        """
+
+    def activate(self, hwnd: Optional[int]) -> None:
+        """
+        Make sure the target window can receive input.
+
+        Args:
+            hwnd: Window handle
+        """
+
+    def keypress(self, hwnd: Optional[int], key: Key, hold: int) -> bool:
+        """
+        Press and release a key.
+
+        Args:
+            hwnd: Window handle
+            key: Key to press
+            hold: Hold duration in milliseconds
+
+        Returns:
+            True if successful, False otherwise
+        """
+        raise NotImplementedError
+
+class MessageBackend(InputBackend):
+    """Sends WM_KEYDOWN/WM_KEYUP directly to the window, works in the background."""
+
+    name = 'message'
+
+    def __init__(self, keys, clock: Clock = CLOCK):
+        import win32api
+        import win32con
+        self._send = win32api.SendMessage
+        self._down = win32con.WM_KEYDOWN
+        self._up = win32con.WM_KEYUP
+        self.keys = keys
+        self.clock = clock
+
+    def refresh(self) -> None:
+        self.keys.refresh()
+
+    def prepare(self, keys: Iterable[Key]) -> None:
+        self.keys.prepare(keys)
+
+    def keypress(self, hwnd: Optional[int], key: Key, hold: int) -> bool:
+        try:
+            vk = self.keys.resolve(key)[0]
+        except ValueError as e:
+            logger.error(f"Error pressing key {key}: {e}")
+            return False
+        self._send(hwnd, self._down, vk, 0)
+        self.clock.sleep(self.clock.uniform((hold - 10) / 1000, (hold + 20) / 1000))
+        self._send(hwnd, self._up, vk, 0)
+        return True
+
+class SendInputBackend(InputBackend):
+    """Injects keys through SendInput, the window has to be in the foreground."""
+
+    name = 'sendinput'
+
+    def __init__(self, keyboard):
+        self.keyboard = keyboard
+
+    def refresh(self) -> None:
+        self.keyboard.keys.refresh()
+
+    def prepare(self, keys: Iterable[Key]) -> None:
+        self.keyboard.keys.prepare(keys)
+
+    def activate(self, hwnd: Optional[int]) -> None:
+        from scripts.window import activate
+        activate(hwnd)
+
+    def keypress(self, hwnd: Optional[int], key: Key, hold: int) -> bool:
+        return self.keyboard.keypress(key, hold)
+
+class EventJournal:
+    """
+    Compact array-backed journal of (timestamp, key, down/up) events.
+    Keys are interned so each event costs 8 + 2 + 1 bytes.
+    """
+
+    def __init__(self):
+        self.times = array('d')
+        self.codes = array('H')
+        self.flags = array('B')
+        self.keys: List[Key] = []
+        self._ids: Dict[Key, int] = {}
+
+    def append(self, timestamp: float, key: Key, down: bool) -> None:
+        """
+        Record one key event.
+
+        Args:
+            timestamp: Event time in seconds
+            key: Key that changed state
+            down: True for key down, False for key up
+        """
+        code = self._ids.get(key)
+        if code is None:
+            code = self._ids[key] = len(self.keys)
+            self.keys.append(key)
+        self.times.append(timestamp)
+        self.codes.append(code)
+        self.flags.append(down)
+
+    def clear(self) -> None:
+        """Drop all recorded events."""
+        del self.times[:], self.codes[:], self.flags[:]
+
+    def __len__(self) -> int:
+        return len(self.times)
+
+    def __iter__(self) -> Iterator[Tuple[float, Key, bool]]:
+        keys = self.keys
+        for t, code, flag in zip(self.times, self.codes, self.flags):
+            yield t, keys[code], bool(flag)
+
+    def press_intervals(self) -> List[float]:
+        """Return the time between consecutive key down events, in seconds."""
+        downs = [t for t, flag in zip(self.times, self.flags) if flag]
+        return [b - a for a, b in zip(downs, downs[1:])]
+
+    def summary(self) -> Dict[str, Any]:
+        """
+        Summarise throughput and timing jitter of the recorded events.
+
+        Returns:
+            Dictionary with event count, duration, events per second and
+            mean/stdev of the interval between key presses
+        """
+        count = len(self.times)
+        duration = self.times[-1] - self.times[0] if count > 1 else 0.0
+        intervals = self.press_intervals()
+        return {
+            'events': count,
+            'duration': duration,
+            'events_per_second': (count - 1) / duration if duration > 0 else 0.0,
+            'interval_mean': statistics.fmean(intervals) if intervals else 0.0,
+            'interval_jitter': statistics.pstdev(intervals) if len(intervals) > 1 else 0.0,
+        }
+
+class RecordingBackend(InputBackend):
+    """Records every key event into an EventJournal instead of sending it."""
+
+    name = 'recording'
+
+    def __init__(self, journal: Optional[EventJournal] = None, clock: Clock = CLOCK):
+        self.journal = journal if journal is not None else EventJournal()
+        self.clock = clock
+
+    def keypress(self, hwnd: Optional[int], key: Key, hold: int) -> bool:
+        variation = RANDOM_VARIATION_FACTOR
+        self.journal.append(self.clock.perf_counter(), key, True)
+        self.clock.sleep(self.clock.uniform(hold * (1 - variation) / 1000, hold * (1 + variation) / 1000))
+        self.journal.append(self.clock.perf_counter(), key, False)
+        return True
@@ -0,0 +1,84 @@
+"""
+Headless benchmarks for the farming loop.
+Run with: python -m scripts.bench
+"""
+
+import time
+import logging
+from typing import Dict, Any, List
+from scripts.backends import RecordingBackend
+from scripts.clock import Clock
+from scripts.constants import STOP_TIMEOUT_SECONDS
+from scripts.schema import DEFAULT_CONFIG
+from scripts.input import KeySequence
+from scripts.settings import SettingsStore
+from scripts.timer import Timer
+
+logger = logging.getLogger(__name__)
+
+# Settings used by the headless runs (kept short so phases are reached quickly)
+BENCH_SETTINGS = {
+    'game_start_spam': 2,
+    'game_restart_delay': 30,
+    'game_load_time': 30,
+    'reconnect_delay': 3,
+    'menu_key_presses': 6,
+    'menu_key_presses_delay': 1000,
+    'keypress_hold': 20,
+    'keypress_delay': 10,
+}
+
+def _measure(timer: Timer, minutes: int, sequence: List[str], pause: bool) -> Dict[str, float]:
+    timer.start(minutes, sequence)
+    time.sleep(timer.clock.uniform(0.2, 0.5))
+    if pause:
+        timer.pause()
+        time.sleep(0.1)
+    thread = timer._timer_thread
+    start = time.perf_counter()
+    timer.stop()
+    returned = time.perf_counter() - start
+    thread.join()
+    exited = time.perf_counter() - start
+    return {'stop_returned': returned, 'thread_exited': exited}
+
+def bench_stop_latency(trials: int = 5, seed: int = 0) -> Dict[str, Any]:
+    """
+    Measure how long stopping takes in each kind of wait.
+
+    Args:
+        trials: Number of stops per scenario
+        seed: Seed for stop points and key timing variation, so runs are repeatable
+
+    Returns:
+        Dictionary mapping scenario name to its worst latencies (seconds)
+        plus an overall 'passed' flag against STOP_TIMEOUT_SECONDS
+    """
+    clock = Clock(seed)
+    settings = SettingsStore({**DEFAULT_CONFIG, **BENCH_SETTINGS})
+    keyseq = KeySequence(settings, RecordingBackend(clock=clock), clock=clock)
+    timer = Timer(settings, keyseq, {'hwnd': None, 'total_games': 0, 'total_gold': 0,
+                                     'total_exp': 0, 'current_exp': 0}, clock=clock)
+    scenarios = {
+        'countdown': (25, [], False),
+        'paused': (25, [], True),
+        'sequence countdown': (25, ['wait_restart'], False),
+        'inter-key delay': (25, ['open_menu'], False),
+    }
+    results: Dict[str, Any] = {}
+    for name, (minutes, sequence, pause) in scenarios.items():
+        runs = [_measure(timer, minutes, sequence, pause) for _ in range(trials)]
+        results[name] = {key: max(run[key] for run in runs) for key in runs[0]}
+    results['passed'] = all(
+        result['thread_exited'] <= STOP_TIMEOUT_SECONDS
+        for result in results.values() if isinstance(result, dict)
+    )
+    return results
+
+if __name__ == '__main__':
+    results = bench_stop_latency()
+    for name, result in results.items():
+        if isinstance(result, dict):
+            print(f"{name:20} stop returned in {result['stop_returned'] * 1000:6.1f} ms, "
+                  f"thread exited in {result['thread_exited'] * 1000:6.1f} ms")
+    print(f"stop latency within {STOP_TIMEOUT_SECONDS * 1000:.0f} ms: {'yes' if results['passed'] else 'NO'}")
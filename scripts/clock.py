@@ -0,0 +1,120 @@
+"""
+Clocks for the farming loop.
+Timer, KeySequence, the keyboard and the input backends read time, wait and
+draw their random timing variation through a Clock, so the same code runs
+against wall-clock time or a VirtualClock that jumps ahead instantly, and a
+seeded clock makes every random hold and delay reproducible.
+"""
+
+import time
+import random
+import threading
+from typing import Callable, Optional
+
+class Clock:
+    """Wall-clock time, the default for every component."""
+
+    def __init__(self, seed: Optional[int] = None):
+        self.random = random.Random(seed)
+
+    def uniform(self, a: float, b: float) -> float:
+        """
+        Random float in [a, b] from this clock's generator.
+
+        Args:
+            a: Lower bound
+            b: Upper bound
+
+        Returns:
+            Random value
+        """
+        return self.random.uniform(a, b)
+
+    def monotonic(self) -> float:
+        """Seconds from an arbitrary start, never goes backwards."""
+        return time.monotonic()
+
+    def perf_counter(self) -> float:
+        """High resolution timestamp for measuring short intervals."""
+        return time.perf_counter()
+
+    def time(self) -> float:
+        """Unix time in seconds."""
+        return time.time()
+
+    def sleep(self, seconds: float) -> None:
+        """
+        Block for a duration.
+
+        Args:
+            seconds: Time to sleep in seconds
+        """
+        time.sleep(seconds)
+
+    def wait(self, event: threading.Event, timeout: Optional[float] = None) -> bool:
+        """
+        Block until the event is set or the timeout passes.
+
+        Args:
+            event: Event to wait for
+            timeout: Maximum wait in seconds, None waits forever
+
+        Returns:
+            True if the event is set
+        """
+        return event.wait(timeout)
+
+class VirtualClock(Clock):
+    """
+    Simulated time that advances only when something sleeps or waits.
+    Single-threaded: waits return at once, events can only be set by the
+    waiting thread itself (e.g. Timer.stop from inside the loop).
+    """
+
+    def __init__(self, start: float = 0.0, epoch: float = 0.0, seed: Optional[int] = 0):
+        super().__init__(seed)
+        self.now = start
+        self.epoch = epoch
+        self.limit: Optional[float] = None
+        self.on_limit: Optional[Callable[[], None]] = None
+
+    def run_until(self, limit: float, on_limit: Callable[[], None]) -> None:
+        """
+        Call on_limit once simulated time reaches the limit.
+
+        Args:
+            limit: Simulated monotonic time to stop at
+            on_limit: Callback, typically Timer.stop
+        """
+        self.limit = limit
+        self.on_limit = on_limit
+
+    def _advance(self, seconds: float) -> None:
+        self.now += max(0.0, seconds)
+        if self.limit is not None and self.now >= self.limit:
+            self.now = self.limit
+            callback, self.on_limit, self.limit = self.on_limit, None, None
+            if callback:
+                callback()
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def perf_counter(self) -> float:
+        return self.now
+
+    def time(self) -> float:
+        return self.epoch + self.now
+
+    def sleep(self, seconds: float) -> None:
+        self._advance(seconds)
+
+    def wait(self, event: threading.Event, timeout: Optional[float] = None) -> bool:
+        if not event.is_set():
+            if timeout is None:
+                raise RuntimeError('VirtualClock cannot wait forever for an event')
+            self._advance(timeout)
+        return event.is_set()
+
+# Shared default instance
+CLOCK = Clock()
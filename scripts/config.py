@@ -1,21 +1,24 @@
+import io
 import os
 import sys
+import threading
 import configparser
-import dearpygui.dearpygui as dpg
-
-import os
-import sys
-import configparser
-import dearpygui.dearpygui as dpg
-from typing import Dict, Any
+from typing import Dict, Any, Optional, Set
 import logging
 from scripts.constants import (
     CONFIG_FILENAME, 
+    STATS_FILENAME,
+    WAITS_FILENAME,
+    SEQUENCES_PATH,
+    SCREENS_PATH,
+    GLYPHS_PATH,
     ICON_PATH, 
     MAIN_FONT_PATH, 
     ICON_FONT_PATH, 
-    DEFAULT_CONFIG
+    CONFIG_SAVE_DELAY_SECONDS
 )
+from scripts.schema import DEFAULT_CONFIG, WIDGET_TAGS, validate
+from scripts.settings import SettingsStore
 
 # Set up logging
 logger = logging.getLogger(__name__)
@@ -52,11 +55,23 @@ class Config:
         self.version = '0.1.0'
         self.filepath = os.path.join(script_dir(), filepath)
         self.icon = os.path.join(script_dir(), ICON_PATH)
+        self.stats_file = os.path.join(script_dir(), STATS_FILENAME)
+        self.waits_file = os.path.join(script_dir(), WAITS_FILENAME)
+        self.sequences_file = os.path.join(script_dir(), SEQUENCES_PATH)
+        self.screens_dir = os.path.join(script_dir(), SCREENS_PATH)
+        self.glyphs_dir = os.path.join(script_dir(), GLYPHS_PATH)
         self.main_font = os.path.join(script_dir(), MAIN_FONT_PATH)
         self.icon_font = os.path.join(script_dir(), ICON_FONT_PATH)
         self.defaults = DEFAULT_CONFIG.copy()
         self.config = configparser.ConfigParser()
         self.data: Dict[str, Any] = {}
+        # Keys changed since the last write, guarded by _lock
+        self._dirty: Set[str] = set()
+        self._lock = threading.Lock()
+        # Held from snapshot to rename so an older snapshot never replaces a newer one
+        self._write_lock = threading.Lock()
+        self._pending: Optional[threading.Timer] = None
+        self.writes = 0
         self.load()
 
     def load(self) -> None:
@@ -76,85 +91,104 @@ class Config:
             if updated:
                 self._write_config()
 
-            # Load values with proper type conversion
-            for key, default_value in self.defaults.items():
-                try:
-                    if isinstance(default_value, bool):
-                        self.data[key] = self.config.getboolean('settings', key)
-                    elif isinstance(default_value, int):
-                        self.data[key] = self.config.getint('settings', key)
-                    elif isinstance(default_value, float):
-                        self.data[key] = self.config.getfloat('settings', key)
-                    else:
-                        self.data[key] = self.config.get('settings', key)
-                except (ValueError, TypeError) as e:
-                    logger.warning(f"Invalid config value for {key}: {e}, using default")
-                    self.data[key] = default_value
+            # Convert and range check every value through the schema
+            for key in self.defaults:
+                self.data[key] = validate(key, self.config.get('settings', key))
                     
         except Exception as e:
             logger.error(f"Error loading config: {e}")
             # Use defaults if config loading fails
             self.data = self.defaults.copy()
 
+    def watch(self, settings: SettingsStore) -> None:
+        """Persist every change made to a settings store."""
+        settings.subscribe(self.set)
+
+    def set(self, key: str, value: Any) -> None:
+        """
+        Change a value and schedule a write.
+        Bursts of changes (dragging a slider) are coalesced into one write
+        CONFIG_SAVE_DELAY_SECONDS after the last change, on a background thread.
+
+        Args:
+            key: Config key
+            value: New value
+        """
+        if key not in self.defaults:
+            logger.warning(f"Unknown config key: {key}")
+            return
+        value = validate(key, value)
+        with self._lock:
+            if key in self.data and self.data[key] == value:
+                return
+            self.data[key] = value
+            self._dirty.add(key)
+            if self._pending:
+                self._pending.cancel()
+            self._pending = threading.Timer(CONFIG_SAVE_DELAY_SECONDS, self.flush)
+            self._pending.daemon = True
+            self._pending.start()
+
+    def flush(self) -> None:
+        """Write pending changes now."""
+        with self._write_lock:
+            with self._lock:
+                if self._pending:
+                    self._pending.cancel()
+                    self._pending = None
+                if not self._dirty:
+                    return
+                dirty, self._dirty = self._dirty, set()
+                if not self.config.has_section('settings'):
+                    self.config.add_section('settings')
+                for key in dirty:
+                    self.config.set('settings', key, str(self.data[key]))
+                buffer = io.StringIO()
+                self.config.write(buffer)
+
+            try:
+                self._write_config(buffer.getvalue())
+                logger.debug(f"Configuration saved: {', '.join(sorted(dirty))}")
+            except OSError:
+                # Keep the keys dirty so the next change or flush retries them
+                with self._lock:
+                    self._dirty |= dirty
+
     def save(self) -> None:
-        """Save current configuration to file."""
-        config_to_save = {
-            'match_time': 'match_time',
-            'timer_sound': 'timer_sound',
-            'always_on_top': 'always_on_top',
-            'game_start_spam': 'start_spam',
-            'game_restart_delay': 'wait_restart',
-            'game_load_time': 'wait_gameload',
-            'menu_key_presses': 'menu_key_presses',
-            'menu_key_presses_delay': 'menu_key_presses_delay',
-            'disconnect_delay': 'wait_disconnect',
-            'reconnect_delay': 'wait_reconnect',
-            'open_menu_default': 'open_menu_default',
-            'open_menu_fix': 'open_menu_fix',
-            'open_menu_fix2': 'open_menu_fix2',
-            'open_menu_hold': 'open_menu_hold',
-            'open_menu_enter': 'open_menu_enter',
-            'direct_input': 'direct_input',
-            'keypress_hold': 'keypress_hold',
-            'keypress_delay': 'keypress_delay',
-            'beep_frequency': 'beep_frequency',
-            'beep_duration': 'beep_duration',
-            'rate_limit_detect': 'rate_limit_detect',
-            'rate_limit_wait': 'rate_limit_wait',
-            'rate_limit_wait_time': 'rate_limit_wait_time',
-            'max_games': 'max_games',
-            'max_games_amount': 'max_games_amount',
-            'auto_launch': 'auto_launch',
-            'key_light': 'key_light',
-            'key_heavy': 'key_heavy',
-            'key_throw': 'key_throw',
-            'key_left': 'key_left',
-            'key_up': 'key_up',
-            'key_right': 'key_right',
-            'key_down': 'key_down',
-        }
+        """Read every widget and write pending changes (GUI thread, on exit)."""
+        import dearpygui.dearpygui as dpg
 
         try:
-            if not self.config.has_section('settings'):
-                self.config.add_section('settings')
-
-            for config_key, dpg_tag in config_to_save.items():
+            for config_key, dpg_tag in WIDGET_TAGS.items():
                 if dpg.does_item_exist(dpg_tag):
-                    value = dpg.get_value(dpg_tag)
-                    self.data[config_key] = value
-                    self.config.set('settings', config_key, str(value))
-
-            self._write_config()
+                    self.set(config_key, dpg.get_value(dpg_tag))
+            self.flush()
             logger.info("Configuration saved successfully")
-            
+
         except Exception as e:
             logger.error(f"Error saving config: {e}")
 
-    def _write_config(self) -> None:
-        """Write configuration to file."""
+    def _write_config(self, text: Optional[str] = None) -> None:
+        """
+        Replace the config file atomically: write a temporary file, flush it
+        to disk, then rename it over the original, so a crash mid-write
+        leaves the previous file intact.
+
+        Args:
+            text: File contents, defaults to the current parser state
+        """
+        if text is None:
+            buffer = io.StringIO()
+            self.config.write(buffer)
+            text = buffer.getvalue()
+        temp = f'{self.filepath}.tmp'
         try:
-            with open(self.filepath, 'w') as f:
-                self.config.write(f)
-        except IOError as e:
+            with open(temp, 'w') as f:
+                f.write(text)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp, self.filepath)
+            self.writes += 1
+        except OSError as e:
             logger.error(f"Could not write config file: {e}")
             raise
@@ -5,6 +5,9 @@ Centralizes magic numbers and configuration values.
 
 # Timer and gameplay constants
 DEFAULT_MATCH_TIME_MINUTES = 25
+MIN_MATCH_TIME_MINUTES = 1
+MAX_MATCH_TIME_MINUTES = 25
+LOBBY_DEFAULT_MATCH_TIME_MINUTES = 20  # match time a new custom lobby starts with
 EXP_PER_MINUTE_RATIO = 1000 / 25  # 1000 exp per 25 minutes
 GOLD_PER_MINUTE_RATIO = 250 / 25  # 250 gold per 25 minutes
 
@@ -17,10 +20,38 @@ DEFAULT_KEYPRESS_HOLD_MS = 70
 DEFAULT_KEYPRESS_DELAY_MS = 150
 RANDOM_VARIATION_FACTOR = 0.1  # ±10% variation
 
+# Virtual key codes used by sequences (winuser.h)
+VK_RETURN = 0x0D
+VK_ESCAPE = 0x1B
+
+# Virtual key codes by key name (winuser.h), shared by the hotkey listener and
+# the keyboard so every name a rebind can store also resolves when pressed.
+# Where two names share a code, the listener reports the first one.
+VK_CODES = {
+    'enter': VK_RETURN, 'esc': VK_ESCAPE, 'escape': VK_ESCAPE,
+    'spacebar': 0x20, 'space': 0x20, 'tab': 0x09, 'backspace': 0x08,
+    'left': 0x25, 'up': 0x26, 'right': 0x27, 'down': 0x28,
+    **{str(i): 0x30 + i for i in range(10)},  # 0-9
+    **{chr(97 + i): 0x41 + i for i in range(26)},  # a-z
+    **{f'numpad_{i}': 0x60 + i for i in range(10)},  # Numpad 0-9
+    'left_shift': 0xA0, 'right_shift': 0xA1, 'shift': 0x10,
+    'left_control': 0xA2, 'right_control': 0xA3,
+    '+': 0xBB, ',': 0xBC, '-': 0xBD, '.': 0xBE, '/': 0xBF,
+    '`': 0xC0, ';': 0xBA, '[': 0xDB, '\\': 0xDC, ']': 0xDD, "'": 0xDE
+}
+
 # Threading and timing constants
 DEFAULT_UPDATE_TIMEOUT_SECONDS = 10
 GRACEFUL_SHUTDOWN_WAIT_SECONDS = 2
 COOLDOWN_TIMER_DURATION_SECONDS = 2.0
+CONFIG_SAVE_DELAY_SECONDS = 1.0  # quiet time after the last setting change before config.ini is written
+STOP_TIMEOUT_SECONDS = 0.1  # upper bound for Timer.stop() blocking the caller
+
+# Game launch constants
+STEAM_LAUNCH_COMMAND = 'cmd /c start steam://rungameid/291550'
+LAUNCH_TIMEOUT_SECONDS = 60
+LAUNCH_POLL_INITIAL_SECONDS = 0.5
+LAUNCH_POLL_MAX_SECONDS = 4.0
 
 # Audio constants
 DEFAULT_BEEP_FREQUENCY = 500
@@ -33,43 +64,41 @@ WINDOW_TITLE = 'prawl'
 
 # File paths
 CONFIG_FILENAME = 'config.ini'
+STATS_FILENAME = 'stats.dat'
+SEQUENCES_PATH = 'res/sequences.json'
+WAITS_FILENAME = 'waits.json'
+SCREENS_PATH = 'res/screens'
+GLYPHS_PATH = 'res/glyphs'
 ICON_PATH = 'res/prawl-app.ico'
 MAIN_FONT_PATH = 'res/cq-pixel-min.ttf'
 ICON_FONT_PATH = 'res/Piconic.ttf'
 
-# Default configuration values
-DEFAULT_CONFIG = {
-    'match_time': DEFAULT_MATCH_TIME_MINUTES,
-    'timer_sound': False,
-    'always_on_top': True,
-    'game_start_spam': 12,
-    'game_restart_delay': 4,
-    'game_load_time': 15,
-    'menu_key_presses': 2,
-    'menu_key_presses_delay': 0,
-    'disconnect_delay': 100,
-    'reconnect_delay': 4,
-    'open_menu_default': True,
-    'open_menu_fix': False,
-    'open_menu_fix2': False,
-    'open_menu_hold': False,
-    'open_menu_enter': True,
-    'direct_input': False,
-    'keypress_hold': DEFAULT_KEYPRESS_HOLD_MS,
-    'keypress_delay': DEFAULT_KEYPRESS_DELAY_MS,
-    'beep_frequency': DEFAULT_BEEP_FREQUENCY,
-    'beep_duration': DEFAULT_BEEP_DURATION_MS,
-    'rate_limit_detect': True,
-    'rate_limit_wait': True,
-    'rate_limit_wait_time': DEFAULT_RATE_LIMIT_WAIT_TIME_MINUTES,
-    'max_games': False,
-    'max_games_amount': 16,
-    'auto_launch': False,
-    'key_light': 'c',
-    'key_heavy': 'x',
-    'key_throw': 'v',
-    'key_left': 'left',
-    'key_up': 'up',
-    'key_right': 'right',
-    'key_down': 'down',
-}
\ No newline at end of file
+# Stats log fsync batching
+STATS_FSYNC_RECORDS = 10
+STATS_FSYNC_SECONDS = 300
+
+# Analytics
+ANALYTICS_MIN_CYCLES = 20  # cycles needed before measured rates replace the ratios
+
+# Pixel search
+DETECT_GRID = (48, 27)  # feature grid (width, height) frames are reduced to
+DETECT_THRESHOLD = 0.92  # minimum correlation with a template
+DETECT_POLL_SECONDS = 0.25  # how often a wait checks the screen
+
+# Reward screen reader
+GLYPH_SIZE = (12, 16)  # (width, height) every digit glyph is scaled to
+GLYPH_MATCH = 0.85  # minimum fraction of agreeing pixels for a glyph
+# Gold and exp counters on the end of match screen, as (left, top, right, bottom) fractions of the client area
+REWARD_REGIONS = {
+    'gold': (0.56, 0.47, 0.70, 0.52),
+    'exp': (0.56, 0.53, 0.70, 0.58),
+}
+REWARD_READ_SECONDS = 8.0  # how long to look for the reward screen after a match
+REWARD_RATE_LIMIT_FRACTION = 0.5  # exp below this share of the expected amount means rate limited
+
+# Adaptive waits
+WAIT_HISTORY = 50  # observed durations kept per wait
+WAIT_MIN_SAMPLES = 5  # observations needed before a wait is shortened
+WAIT_PERCENTILE = 95  # percentile of the history a wait is set to
+WAIT_MARGIN_SECONDS = 1.5  # added on top of the percentile
+WAIT_FALLBACK_CYCLES = 3  # cycles that use the slider values after a failed cycle
@@ -0,0 +1,333 @@
+"""
+Pixel search: recognise game screens from the Brawlhalla client area.
+Frames are captured with PrintWindow (works while the window is hidden or
+covered), reduced to a small grayscale grid and compared against reference
+templates with one normalised matrix product.
+
+Templates are BMP files in res/screens named <screen>.bmp or <screen>_<n>.bmp.
+Capture one with:   python -m scripts.detect capture <screen>
+Test offline with:  python -m scripts.detect test <folder of screenshots>
+"""
+
+import os
+import re
+import sys
+import time
+import struct
+import logging
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from scripts.constants import DETECT_GRID, DETECT_THRESHOLD, SCREENS_PATH
+
+logger = logging.getLogger(__name__)
+
+# PrintWindow flags (winuser.h)
+PW_CLIENTONLY = 0x1
+PW_RENDERFULLCONTENT = 0x2
+
+_SCREEN_NAME = re.compile(r'^([a-z][a-z0-9_]*?)(?:_\d+)?\.bmp$', re.IGNORECASE)
+
+def read_bmp(filepath: str) -> np.ndarray:
+    """
+    Read an uncompressed 24 or 32-bit BMP file.
+
+    Args:
+        filepath: Path to the file
+
+    Returns:
+        RGB array of shape (height, width, 3)
+
+    Raises:
+        ValueError: If the file is not a supported BMP
+    """
+    with open(filepath, 'rb') as f:
+        data = f.read()
+    if data[:2] != b'BM':
+        raise ValueError(f"{filepath}: not a BMP file")
+    offset, = struct.unpack_from('<I', data, 10)
+    width, height, _, bpp, compression = struct.unpack_from('<iiHHI', data, 18)
+    if bpp not in (24, 32) or compression not in (0, 3):
+        raise ValueError(f"{filepath}: only uncompressed 24/32-bit BMP is supported")
+    channels = bpp // 8
+    stride = (width * channels + 3) & ~3
+    rows = np.frombuffer(data, np.uint8, stride * abs(height), offset).reshape(abs(height), stride)
+    pixels = rows[:, :width * channels].reshape(abs(height), width, channels)
+    if height > 0:
+        pixels = pixels[::-1]
+    return pixels[..., 2::-1].copy()
+
+def write_bmp(filepath: str, frame: np.ndarray) -> None:
+    """
+    Write an RGB array as a 24-bit BMP file.
+
+    Args:
+        filepath: Destination path
+        frame: RGB array of shape (height, width, 3)
+    """
+    height, width = frame.shape[:2]
+    stride = (width * 3 + 3) & ~3
+    rows = np.zeros((height, stride), np.uint8)
+    rows[:, :width * 3] = frame[::-1, :, ::-1].reshape(height, width * 3)
+    header = struct.pack('<2sIHHI', b'BM', 54 + rows.nbytes, 0, 0, 54)
+    info = struct.pack('<IiiHHIIiiII', 40, width, height, 1, 24, 0, rows.nbytes, 2835, 2835, 0, 0)
+    with open(filepath, 'wb') as f:
+        f.write(header + info + rows.tobytes())
+
+def capture(hwnd: int) -> Optional[np.ndarray]:
+    """
+    Grab the client area of a window, also when it is hidden or covered.
+
+    Args:
+        hwnd: Window handle
+
+    Returns:
+        RGB array of shape (height, width, 3), None if the capture failed
+    """
+    import ctypes
+    import win32gui
+    import win32ui
+
+    left, top, right, bottom = win32gui.GetClientRect(hwnd)
+    width, height = right - left, bottom - top
+    if width <= 0 or height <= 0:
+        return None
+    window_dc = source = target = bitmap = None
+    try:
+        window_dc = win32gui.GetDC(hwnd)
+        source = win32ui.CreateDCFromHandle(window_dc)
+        target = source.CreateCompatibleDC()
+        compatible = win32ui.CreateBitmap()
+        compatible.CreateCompatibleBitmap(source, width, height)
+        bitmap = compatible
+        target.SelectObject(bitmap)
+        if not ctypes.windll.user32.PrintWindow(hwnd, target.GetSafeHdc(), PW_CLIENTONLY | PW_RENDERFULLCONTENT):
+            return None
+        bgra = np.frombuffer(bitmap.GetBitmapBits(True), np.uint8).reshape(height, width, 4)
+        return bgra[..., 2::-1].copy()
+    except Exception as e:
+        logger.warning(f"Screen capture failed: {e}")
+        return None
+    finally:
+        # Only release what was actually acquired
+        if bitmap is not None:
+            win32gui.DeleteObject(bitmap.GetHandle())
+        if target is not None:
+            target.DeleteDC()
+        if source is not None:
+            source.DeleteDC()
+        if window_dc:
+            win32gui.ReleaseDC(hwnd, window_dc)
+
+def downsample(frame: np.ndarray, grid: Tuple[int, int] = DETECT_GRID) -> Optional[np.ndarray]:
+    """
+    Reduce a frame to a normalised grayscale feature vector.
+    Each cell of the grid is the mean of its block of pixels, the vector is
+    shifted to zero mean and scaled to unit length so a dot product of two
+    vectors is their correlation, independent of brightness and contrast.
+
+    Args:
+        frame: RGB array of shape (height, width, 3)
+        grid: Output (width, height) in cells
+
+    Returns:
+        Float32 vector of length width * height, None for a frame smaller than the grid
+    """
+    cols, rows = grid
+    height, width = frame.shape[:2]
+    if height < rows or width < cols:
+        return None
+    gray = frame[..., 0] * 0.299 + frame[..., 1] * 0.587 + frame[..., 2] * 0.114
+    block_h, block_w = height // rows, width // cols
+    cells = gray[:block_h * rows, :block_w * cols].reshape(rows, block_h, cols, block_w).mean(axis=(1, 3))
+    vector = cells.ravel().astype(np.float32)
+    vector -= vector.mean()
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm > 0 else vector
+
+def screen_name(filename: str) -> Optional[str]:
+    """Screen a template or test file belongs to, from its name."""
+    match = _SCREEN_NAME.match(filename)
+    return match.group(1).lower() if match else None
+
+class Classifier:
+    """Matches frames against every template at once."""
+
+    def __init__(self, templates: Dict[str, List[np.ndarray]], threshold: float = DETECT_THRESHOLD):
+        self.threshold = threshold
+        self.labels: List[str] = []
+        vectors = []
+        for name, frames in templates.items():
+            for frame in frames:
+                vector = downsample(frame)
+                if vector is None:
+                    logger.warning(f"Skipping a {name} template smaller than the detection grid")
+                    continue
+                self.labels.append(name)
+                vectors.append(vector)
+        self.matrix = np.stack(vectors) if vectors else np.zeros((0, DETECT_GRID[0] * DETECT_GRID[1]), np.float32)
+        self.screens = frozenset(self.labels)
+
+    @classmethod
+    def from_folder(cls, folder: str, threshold: float = DETECT_THRESHOLD) -> 'Classifier':
+        """
+        Load every template BMP in a folder.
+
+        Args:
+            folder: Template folder
+            threshold: Minimum correlation for a match
+
+        Returns:
+            Classifier, without templates if the folder is missing
+        """
+        templates: Dict[str, List[np.ndarray]] = {}
+        if os.path.isdir(folder):
+            for filename in sorted(os.listdir(folder)):
+                name = screen_name(filename)
+                if not name:
+                    continue
+                try:
+                    templates.setdefault(name, []).append(read_bmp(os.path.join(folder, filename)))
+                except (OSError, ValueError) as e:
+                    logger.warning(f"Skipping template {filename}: {e}")
+        logger.info(f"Loaded {sum(map(len, templates.values()))} screen templates for {sorted(templates)}")
+        return cls(templates, threshold)
+
+    def classify(self, frame: np.ndarray) -> Tuple[Optional[str], float]:
+        """
+        Name the screen a frame shows.
+
+        Args:
+            frame: RGB array
+
+        Returns:
+            (screen name or None below the threshold or for a frame smaller
+            than the grid, best correlation)
+        """
+        vector = downsample(frame)
+        if not len(self.labels) or vector is None:
+            return None, 0.0
+        scores = self.matrix @ vector
+        best = int(np.argmax(scores))
+        score = float(scores[best])
+        return (self.labels[best] if score >= self.threshold else None), score
+
+class Detector:
+    """
+    Live screen detection for KeySequence waits, with a tally of the time it saved.
+    """
+
+    def __init__(self, folder: str = SCREENS_PATH, threshold: float = DETECT_THRESHOLD):
+        self.classifier = Classifier.from_folder(folder, threshold)
+        self.checks = 0
+        self.hits = 0
+        self.capture_time = 0.0
+        self.seconds_saved = 0.0
+        self.cycle_saved = 0.0
+
+    def knows(self, screen: str) -> bool:
+        """True if there is a template for the screen, otherwise waits run in full."""
+        return screen in self.classifier.screens
+
+    def matches(self, hwnd: int, screen: str) -> bool:
+        """
+        Capture the window and check whether it shows a screen.
+
+        Args:
+            hwnd: Window handle
+            screen: Expected screen name
+
+        Returns:
+            True if the current frame is classified as that screen
+        """
+        start = time.perf_counter()
+        frame = capture(hwnd)
+        found = self.classifier.classify(frame)[0] if frame is not None else None
+        self.capture_time += time.perf_counter() - start
+        self.checks += 1
+        if found == screen:
+            self.hits += 1
+            return True
+        return False
+
+    def saved(self, seconds: float) -> None:
+        """Record time a wait ended ahead of its maximum."""
+        self.seconds_saved += seconds
+        self.cycle_saved += seconds
+
+    def end_cycle(self) -> float:
+        """
+        Close the per-cycle tally.
+
+        Returns:
+            Seconds saved during the cycle that just ended
+        """
+        saved, self.cycle_saved = self.cycle_saved, 0.0
+        return saved
+
+    def stats(self) -> Dict[str, float]:
+        """Checks, hits, mean capture+classify time (ms) and total seconds saved."""
+        return {
+            'checks': self.checks,
+            'hits': self.hits,
+            'capture_ms': self.capture_time / self.checks * 1000 if self.checks else 0.0,
+            'seconds_saved': self.seconds_saved,
+        }
+
+def test_folder(folder: str, classifier: Classifier) -> Dict[str, object]:
+    """
+    Classify every screenshot in a folder and compare with its file name.
+    Files named unknown_<n>.bmp are expected to match nothing.
+
+    Args:
+        folder: Folder of BMP screenshots named like templates
+        classifier: Classifier to test
+
+    Returns:
+        Dictionary with accuracy, per-frame time and the misclassified files
+    """
+    total = correct = 0
+    elapsed = 0.0
+    mistakes = []
+    for filename in sorted(os.listdir(folder)):
+        expected = screen_name(filename)
+        if not expected:
+            continue
+        frame = read_bmp(os.path.join(folder, filename))
+        start = time.perf_counter()
+        found, score = classifier.classify(frame)
+        elapsed += time.perf_counter() - start
+        total += 1
+        if (found or 'unknown') == expected:
+            correct += 1
+        else:
+            mistakes.append((filename, found, round(score, 3)))
+    return {
+        'frames': total,
+        'accuracy': correct / total if total else 0.0,
+        'classify_ms': elapsed / total * 1000 if total else 0.0,
+        'mistakes': mistakes,
+    }
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    # The folder the app loads templates from (next to main.py), wherever this is run from
+    screens = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), SCREENS_PATH)
+    if len(sys.argv) == 3 and sys.argv[1] == 'test':
+        results = test_folder(sys.argv[2], Classifier.from_folder(screens))
+        print(f"{results['frames']} frames, accuracy {results['accuracy']:.1%}, "
+              f"{results['classify_ms']:.2f} ms per frame")
+        for filename, found, score in results['mistakes']:
+            print(f"  {filename}: got {found} ({score})")
+    elif len(sys.argv) == 3 and sys.argv[1] == 'capture':
+        import scripts.window as window
+        hwnd = window.find()
+        frame = capture(hwnd) if hwnd else None
+        if frame is None:
+            sys.exit('brawlhalla window not found or capture failed')
+        os.makedirs(screens, exist_ok=True)
+        index = len([f for f in os.listdir(screens) if screen_name(f) == sys.argv[2]])
+        path = os.path.join(screens, f'{sys.argv[2]}_{index}.bmp')
+        write_bmp(path, frame)
+        print(f"saved {path}")
+    else:
+        sys.exit('usage: python -m scripts.detect test <folder> | capture <screen>')
@@ -0,0 +1,119 @@
+"""
+Headless farming loop: runs Timer and KeySequence from config.ini and a
+few command line flags, without loading DearPyGui.
+"""
+
+import time
+import logging
+import argparse
+import scripts.window as window
+from scripts.config import Config
+from scripts.input import KeySequence, farm_sequence
+from scripts.timer import Timer
+from scripts.ui import StatusLog
+from scripts.settings import SettingsStore
+from scripts.stats import StatsStore
+from scripts.waits import WaitHistory
+from scripts.sequences import SequenceSource
+from scripts._direct import Keyboard
+from scripts.backends import MessageBackend, SendInputBackend
+from scripts.launch import LaunchJob
+from scripts.constants import ANALYTICS_MIN_CYCLES, LAUNCH_TIMEOUT_SECONDS, WAIT_PERCENTILE
+
+logger = logging.getLogger(__name__)
+
+def _wait_for_launch() -> bool:
+    """Launch the game and block until its window shows up."""
+    def report(event, data):
+        if event != 'waiting':
+            logger.info(f"launch: {event}" + (f" ({data})" if data is not None else ''))
+
+    job = LaunchJob(report)
+    job.start()
+    job.wait(LAUNCH_TIMEOUT_SECONDS + 15)
+    return window.find() is not None
+
+def run(args: argparse.Namespace) -> int:
+    """
+    Run the farming loop until it stops or is interrupted.
+
+    Args:
+        args: Parsed command line flags (see main.parse_args)
+
+    Returns:
+        Process exit code
+    """
+    if args.log_file:
+        handler = logging.FileHandler(args.log_file)
+        handler.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
+        logging.getLogger().addHandler(handler)
+
+    config = Config()
+    values = dict(config.data)
+    if args.minutes:
+        values['match_time'] = args.minutes
+    if args.max_games:
+        values['max_games'] = True
+        values['max_games_amount'] = args.max_games
+    if args.direct_input:
+        values['direct_input'] = True
+    settings = SettingsStore(values)
+
+    state = {
+        'total_games': 0,
+        'total_gold': 0,
+        'total_exp': 0,
+        'current_exp': 0,
+        'hwnd': window.find()
+    }
+    if not state['hwnd'] and args.launch and _wait_for_launch():
+        state['hwnd'] = window.find()
+    if not state['hwnd']:
+        logger.error("brawlhalla window not found")
+        return 1
+
+    status = StatusLog()
+    keyboard = Keyboard()
+    waits = WaitHistory(config.waits_file)
+    detector = rewards = None
+    if settings.current.pixel_search:
+        from scripts.detect import Detector
+        from scripts.rewards import RewardReader
+        detector = Detector(config.screens_dir)
+        rewards = RewardReader(config.glyphs_dir)
+    keyseq = KeySequence(settings, MessageBackend(keyboard.keys), SendInputBackend(keyboard), status,
+                         sequences=SequenceSource(config.sequences_file), detector=detector,
+                         waits=waits)
+    stats = StatsStore(config.stats_file)
+    lifetime = stats.lifetime()
+    logger.info(f"lifetime: {lifetime['games']} games, {int(lifetime['gold'])} gold, {int(lifetime['exp'])} exp")
+    if stats.count >= ANALYTICS_MIN_CYCLES:
+        from scripts.analytics import apply_measured_rates
+        summary = apply_measured_rates(config.stats_file).summary()
+        logger.info(f"measured: {summary['per_hour']['gold']:.0f} gold/h, {summary['per_hour']['exp']:.0f} exp/h, "
+                    f"median cycle {summary['cycle_time'][50]:.0f}s")
+    timer = Timer(settings, keyseq, state, status, stats, rewards=rewards)
+
+    snapshot = settings.current
+    timer.start(snapshot.match_time, farm_sequence(snapshot))
+    try:
+        while timer.running:
+            time.sleep(0.5)
+    except KeyboardInterrupt:
+        logger.info("interrupted, stopping...")
+        timer.stop()
+    finally:
+        stats.close()
+        waits.save()
+
+    logger.info(f"finished: {state['total_games']} games, {int(state['total_gold'])} gold, {int(state['total_exp'])} exp")
+    if detector:
+        detection = detector.stats()
+        per_cycle = detection['seconds_saved'] / state['total_games'] if state['total_games'] else 0.0
+        logger.info(f"pixel search: {detection['hits']}/{detection['checks']} matches, {detection['capture_ms']:.1f} ms per check, "
+                    f"{per_cycle:.1f}s saved per cycle")
+    for key, learned in waits.stats().items():
+        logger.info(f"{key}: {learned['samples']} observed, p{WAIT_PERCENTILE} {learned['percentile']:.1f}s")
+    if rewards and rewards.available:
+        logger.info(f"reward screen: {rewards.reads} read, {rewards.failures} estimated")
+    return 0
@@ -1,38 +1,61 @@
+import math
 import time
-import random
-import win32api
-import win32con
-import dearpygui.dearpygui as dpg
-from typing import Optional, List, Dict, Any, Callable, Tuple
+from typing import Optional, List, Dict, Callable, Tuple
 import logging
-from scripts.window import activate
-from scripts._direct import Keyboard
+from scripts.backends import InputBackend
+from scripts.ui import UIQueue
+from scripts.settings import Settings, SettingsStore
+from scripts.clock import Clock, CLOCK
+from scripts.sequences import (
+    Step, SequenceSource, SequenceSpec, compile_sequences, bound_keys,
+    STATUS, WAIT, COUNTDOWN, PRESS
+)
 from scripts.constants import (
     DEFAULT_KEYPRESS_HOLD_MS, 
     DEFAULT_KEYPRESS_DELAY_MS, 
     RANDOM_VARIATION_FACTOR,
-    DEFAULT_MATCH_TIME_MINUTES
+    DEFAULT_MATCH_TIME_MINUTES,
+    DETECT_POLL_SECONDS,
+    VK_CODES
 )
 
 logger = logging.getLogger(__name__)
 
+# Settings every compiled plan depends on, plus the ones the sequence file references;
+# a change to any of them recompiles it
+PLAN_FIELDS = (
+    'match_time', 'open_menu_enter', 'keypress_hold', 'keypress_delay',
+    'key_light', 'key_heavy', 'key_throw', 'key_left', 'key_up', 'key_right', 'key_down',
+)
+
+def farm_sequence(settings: Settings) -> List[str]:
+    """
+    Build the list of sequences run once per farming cycle.
+
+    Args:
+        settings: Snapshot providing the disconnect/reconnect mode
+
+    Returns:
+        Sequence names in execution order
+    """
+    sequence = ['wait_restart', 'spam_menu', 'open_menu', 'disconnect', 'reconnect']
+    if settings.open_menu_hold:
+        sequence = ['open_menu_hold' if item == 'open_menu' else item for item in sequence]
+    if settings.open_menu_fix:
+        sequence = ['open_menu_fix' if item == 'open_menu' else item for item in sequence]
+    if settings.open_menu_fix2:
+        sequence = [sub for item in sequence for sub in (['open_menu_fix', 'open_menu_fix'] if item == 'open_menu' else [item])]
+    return sequence
+
 class KeyListener:
     """Handles keyboard input detection for hotkey configuration."""
     
     def __init__(self):
-        # Virtual key code mappings for input detection
-        self.VK_CODE = {
-            'enter': 13, 'esc': 27, 'spacebar': 32,
-            'left': 37, 'up': 38, 'right': 39, 'down': 40,
-            **{str(i): 48 + i for i in range(10)},  # 0-9
-            **{chr(65 + i): 65 + i for i in range(26)},  # A-Z
-            **{f'numpad_{i}': 96 + i for i in range(10)},  # Numpad 0-9
-            'left_shift': 160, 'right_shift': 161, 
-            'left_control': 162, 'right_control': 163,
-            '+': 187, ',': 188, '-': 189, '.': 190, '/': 191, 
-            '`': 192, ';': 186, '[': 219, '\\': 220, ']': 221, "'": 222
-        }
-        self.VK_NAME = {v: k for k, v in self.VK_CODE.items()}
+        # Virtual key code mappings for input detection, shared with Keyboard
+        self.VK_CODE = VK_CODES
+        self.VK_NAME = {}
+        for name, code in VK_CODES.items():
+            self.VK_NAME.setdefault(code, name)
 
     def hotkey(self) -> Optional[str]:
         """
@@ -41,6 +64,8 @@ class KeyListener:
         Returns:
             Key name if captured, None if escaped
         """
+        import win32api
+
         try:
             # Wait for all keys to be released first
             while any(win32api.GetAsyncKeyState(key) for key in self.VK_CODE.values()):
@@ -62,15 +87,26 @@ class KeyListener:
 class KeySequence:
     """Handles execution of keyboard action sequences for game automation."""
     
-    def __init__(self, config: Dict[str, Any], keyboard: Keyboard):
-        self.keyboard = keyboard
-        self.config = config
-        self._cache: Optional[Dict] = None
-        self._last_d: Optional[str] = None
-        self._last_a: Optional[int] = None
-        self._last_menu_k: Optional[int] = None
-
-    def _keypress(self, hwnd: int, key, hold: int = None, delay: int = None, direct: bool = False) -> None:
+    def __init__(self, settings: SettingsStore, backend: InputBackend, direct_backend: Optional[InputBackend] = None,
+                 ui: Optional[UIQueue] = None, clock: Clock = CLOCK,
+                 sequences: Optional[SequenceSource] = None, detector=None, waits=None):
+        self.backend = backend
+        # Optional scripts.detect.Detector, ends waits early when pixel search is on
+        self.detector = detector
+        # Optional scripts.waits.WaitHistory, learns and shortens the waits pixel search can observe
+        self.waits = waits
+        self.clock = clock
+        self.direct_backend = direct_backend or backend
+        self.ui = ui or UIQueue()
+        self.settings = settings
+        self.sequences = sequences or SequenceSource()
+        self._cache: Dict[str, Tuple[Step, ...]] = {}
+        self._cache_key: Optional[Tuple] = None
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def _keypress(self, hwnd: int, key, hold: int = None, delay: int = None, direct: bool = False,
+                  sleep: Optional[Callable[[float], bool]] = None) -> None:
         """
         Send a keypress to the specified window.
         
@@ -80,6 +116,7 @@ class KeySequence:
             hold: Hold duration in milliseconds
             delay: Delay after keypress in milliseconds
             direct: Whether to use direct input mode
+            sleep: Cancellable sleep used for the delay after the keypress
         """
         if hold is None:
             hold = DEFAULT_KEYPRESS_HOLD_MS
@@ -87,206 +124,202 @@ class KeySequence:
             delay = DEFAULT_KEYPRESS_DELAY_MS
             
         try:
-            vk = win32api.VkKeyScan(key) if isinstance(key, str) else key
-            
-            if direct:
-                self.keyboard.keypress(key, hold)
-                # Add random variation to delay
-                delay_time = random.uniform(delay, delay + 40) / 1000
-                time.sleep(delay_time)
-            else:
-                # Send key down
-                win32api.SendMessage(hwnd, win32con.WM_KEYDOWN, vk, 0)
-                
-                # Hold time with variation
-                hold_time = random.uniform(
-                    (hold - 10) / 1000, 
-                    (hold + 20) / 1000
-                )
-                time.sleep(hold_time)
-                
-                # Send key up
-                win32api.SendMessage(hwnd, win32con.WM_KEYUP, vk, 0)
-                
-                # Delay with variation
-                delay_time = random.uniform(delay, delay + 40) / 1000
-                time.sleep(delay_time)
+            backend = self.direct_backend if direct else self.backend
+            backend.keypress(hwnd, key, hold)
+
+            # Delay with variation
+            delay_time = self.clock.uniform(delay, delay + 40) / 1000
+            (sleep or self.clock.sleep)(delay_time)
                 
         except Exception as e:
             logger.error(f"Error sending keypress {key}: {e}")
 
-    def _validate_dpg_value(self, tag: str, default: Any) -> Any:
+    def _plan(self, settings: Settings) -> Dict[str, Tuple[Step, ...]]:
         """
-        Safely get value from DearPyGUI with fallback.
-        
+        Return the compiled plan, recompiling only if its settings changed.
+
         Args:
-            tag: DearPyGUI item tag
-            default: Default value if tag doesn't exist
-            
+            settings: Snapshot the run is using
+
         Returns:
-            Value from DPG or default
+            Dictionary mapping sequence names to immutable step tuples
         """
-        try:
-            if dpg.does_item_exist(tag):
-                return dpg.get_value(tag)
-            else:
-                logger.warning(f"DPG item '{tag}' not found, using default: {default}")
-                return default
-        except Exception as e:
-            logger.error(f"Error getting DPG value for '{tag}': {e}")
-            return default
-
-    def _build(
-        self,
-        time_d: int,
-        time_a: int,
-        menu_k: int,
-        hwnd: int
-    ) -> Dict[str, List[Tuple]]:
+        spec = self.sequences.current()
+        fields = PLAN_FIELDS + tuple(sorted(spec.fields))
+        fingerprint = (spec.revision,) + tuple(getattr(settings, field) for field in fields)
+        if fingerprint == self._cache_key:
+            self.cache_hits += 1
+            return self._cache
+
+        self.cache_misses += 1
+        self._cache = self._build(settings, spec)
+        self._cache_key = fingerprint
+        logger.debug(f"Action plan compiled (hits: {self.cache_hits}, misses: {self.cache_misses})")
+        return self._cache
+
+    def plan_stats(self) -> Dict[str, int]:
+        """Return hit/miss counters of the compiled plan cache."""
+        return {'hits': self.cache_hits, 'misses': self.cache_misses}
+
+    def _build(self, settings: Settings, spec: SequenceSpec) -> Dict[str, Tuple[Step, ...]]:
         """
-        Build and return the sequences data structure for automated input actions.
+        Compile every sequence into an immutable list of steps.
 
         Args:
-            time_d (int): Delay time parameter for certain actions.
-            time_a (int): Additional time parameter for actions.
-            menu_k (int): Key code for menu actions.
-            hwnd (int): Window handle to target.
+            settings (Settings): Snapshot providing the values listed in PLAN_FIELDS.
+            spec (SequenceSpec): Validated sequences to compile.
+
+        Returns:
+            Dict[str, Tuple[Step, ...]]: Dictionary mapping sequence names to compiled steps.
+        """
+        bound = bound_keys(settings)
+        self.backend.prepare(bound)
+        if self.direct_backend is not self.backend:
+            self.direct_backend.prepare(bound)
+        return compile_sequences(spec, settings)
+
+    def action(self, sequences, is_running, hwnd, sleep: Optional[Callable[[float], bool]] = None):
+        """
+        Run the given sequences against a window.
+
+        Args:
+            sequences: Names of the sequences to run, in order
+            is_running: Returns False once the run should be abandoned
+            hwnd: Window handle
+            sleep: Cancellable sleep returning False when stopped (e.g. Timer.sleep),
+                defaults to the clock's sleep followed by is_running()
+        """
+        sleep = sleep or self._sleeper(is_running)
+
+        settings = self.settings.current
+        self.backend.refresh()
+        if self.direct_backend is not self.backend:
+            self.direct_backend.refresh()
+        plan = self._plan(settings)
+        steps = [step for seq in sequences if seq in plan for step in plan[seq]]
+        self._run_steps(steps, settings, is_running, hwnd, sleep)
+
+    def problem(self, sequences: List[str]) -> Optional[str]:
+        """
+        Check that the sequence file can run the given sequences.
+
+        Args:
+            sequences: Names of the sequences about to run
+
+        Returns:
+            Error message, None if everything is there
+        """
+        spec = self.sequences.current()
+        if self.sequences.error is not None:
+            return f"sequence file error: {self.sequences.error}"
+        missing = [name for name in sequences if name not in spec.sequences]
+        if missing:
+            return f"sequence file has no {', '.join(missing)}"
+        return None
+
+    def set_match_time(self, current: int, target: int, is_running, hwnd,
+                       sleep: Optional[Callable[[float], bool]] = None) -> None:
+        """
+        Change MATCH TIME in the lobby game rules, scrolling the shorter way round.
+
+        Args:
+            current: Match time the lobby is set to, in minutes
+            target: New match time in minutes
+            is_running: Returns False once the run should be abandoned
+            hwnd: Window handle
+            sleep: Cancellable sleep, see action()
+        """
+        sleep = sleep or self._sleeper(is_running)
+
+        settings = self.settings.current
+        spec = self.sequences.current()
+        if 'set_match_time' not in spec.sequences:
+            logger.error("Sequence file has no set_match_time sequence")
+            return
+        steps = compile_sequences(spec, settings.replace(match_time=target), ['set_match_time'],
+                                  scroll_from=current)['set_match_time']
+        self._run_steps(steps, settings, is_running, hwnd, sleep)
+
+    def _sleeper(self, is_running) -> Callable[[float], bool]:
+        """Sleep on the clock, then report whether the run should continue."""
+        def sleep(seconds):
+            self.clock.sleep(seconds)
+            return is_running()
+        return sleep
+
+    def _run_steps(self, steps, settings: Settings, is_running, hwnd, sleep: Callable[[float], bool]) -> None:
+        """Interpret compiled steps until they finish or is_running() turns False."""
+        direct = settings.direct_input
+        backend = self.direct_backend if direct else self.backend
+        for step in steps:
+            op = step.op
+            if op == PRESS:
+                for _ in range(step.repeat):
+                    if not is_running(): return
+                    if direct: backend.activate(hwnd)
+                    self._keypress(hwnd, step.key, step.hold, step.gap, direct, sleep)
+                    if step.delay > 0 and not sleep(step.delay): return
+            elif op == COUNTDOWN:
+                watch = self._watching(step, settings)
+                seconds = self._length(step, step.repeat, settings, watch)
+                started = self.clock.monotonic()
+                for remaining in range(math.ceil(seconds), 0, -1):
+                    if not is_running(): return
+                    self.ui.status(step.key.format(remaining))
+                    if watch:
+                        if self._watch(hwnd, step.until, 1, sleep) is not None:
+                            self._seen(step, step.repeat, self.clock.monotonic() - started)
+                            break
+                        if not is_running(): return
+                    elif not sleep(1): return
+                else:
+                    if watch and seconds < step.repeat: self.waits.fail()
+            elif op == STATUS:
+                if not is_running(): return
+                self.ui.status(step.key)
+            elif op == WAIT:
+                if not is_running(): return
+                watch = self._watching(step, settings)
+                seconds = self._length(step, step.delay, settings, watch)
+                if watch:
+                    started = self.clock.monotonic()
+                    if self._watch(hwnd, step.until, seconds, sleep) is not None:
+                        self._seen(step, step.delay, self.clock.monotonic() - started)
+                    elif seconds < step.delay and is_running():
+                        self.waits.fail()
+                    if not is_running(): return
+                elif not sleep(seconds): return
+
+    def _watching(self, step: Step, settings: Settings) -> bool:
+        """True if pixel search can end this step early."""
+        return bool(step.until and settings.pixel_search and self.detector and self.detector.knows(step.until))
+
+    def _length(self, step: Step, configured: float, settings: Settings, watch: bool) -> float:
+        """
+        Seconds a WAIT or COUNTDOWN lasts. Adaptive waits only shorten steps
+        pixel search is watching, since a missed screen is their failure signal.
+        """
+        if watch and settings.adaptive_waits and self.waits:
+            return self.waits.duration(step.source, configured)
+        return configured
+
+    def _seen(self, step: Step, configured: float, elapsed: float) -> None:
+        """The screen a step waits for appeared after `elapsed` seconds."""
+        self.detector.saved(max(0.0, configured - elapsed))
+        if self.waits:
+            self.waits.observe(step.source, elapsed)
+
+    def _watch(self, hwnd, screen: str, seconds: float, sleep: Callable[[float], bool]) -> Optional[float]:
+        """
+        Wait up to `seconds` for a screen to appear.
 
         Returns:
-            Dict[str, List[Tuple]]: Dictionary mapping sequence names to lists of action tuples.
+            The unused part of the wait if the screen appeared, None if it did not or the run stopped
         """
-        left = self.config['key_left']
-        up = self.config['key_up']
-        down = self.config['key_down']
-        esc = win32con.VK_ESCAPE
-        light, heavy, throw = self.config['key_light'], self.config['key_heavy'], self.config['key_throw']
-
-        sequences_data = {
-            'wait_restart': [
-                ('countdown', 'wait_restart', 'starting game in {}...'),
-            ],
-            'spam_menu': [
-                ('status', 'spamming through menu!'),
-                ('press', light, {'count': 'start_spam'}),
-                ('countdown', 'wait_gameload', 'waiting for game {}...'),
-            ],
-            'open_menu': [
-                ('status', 'open esc menu'),
-                ('press', menu_k, {'count': 'menu_key_presses', 'delay_tag': 'menu_key_presses_delay'}),
-            ],
-            'disconnect': [
-                ('status', 'wait disconnect delay'),
-                ('wait', 'wait_disconnect'),
-                ('press', up),
-                ('press', light),
-            ],
-            'reconnect': [
-                ('countdown', 'wait_reconnect', 'reconnecting in {}...'),
-                ('status', 'pressing...'),
-                ('press', light, {'count': 2}),
-            ],
-            'open_menu_fix': [
-                ('status', 'esc menu fix...'),
-                ('press', menu_k),
-                ('press', up),
-                ('press', light),
-            ],
-            'open_menu_hold': [
-                ('status', 'open esc menu (hold)'),
-                ('press', menu_k, {'count': 2}),
-                ('press', menu_k, {'hold': 2}),
-            ],
-            'lobby_setup_game_rules': [
-                ('status', 'GAME RULES'), ('press', heavy),
-                ('status', 'selecting CREW BATTLE'), ('press', left, {'count': 6}),
-                ('status', 'setting LIVES to 99'), ('press', down, {'count': 3}), ('press', left, {'count': 3}),
-                ('status', f'setting MATCH TIME {dpg.get_value("match_time")}'), ('press', down), ('press', time_d, {'count': time_a}),
-                ('status', 'setting DAMAGE'), ('press', down, {'count': 2}), ('press', left, {'count': 5}),
-                ('status', 'turning gadgets off'), ('press', down, {'count': 2}), ('press', left),
-                ('status', 'maps to Tournament 1v1'), ('press', down, {'count': 3}), ('press', left, {'count': 2}),
-                ('status', 'setting MAX PLAYERS to 2'), ('press', down), ('press', left, {'count': 2}),
-            ],
-            'lobby_setup_lobby': [
-                ('status', 'LOBBY'), ('press', ']'),
-                ('status', 'turning off FRIENDS'), ('press', down, {'count': 3}), ('press', left),
-                ('status', 'turning off CLANMATES'), ('press', down), ('press', left),
-                ('status', 'setting MAP CHOOSING to Random'), ('press', down, {'count': 2}), ('press', left, {'count': 2}),
-                ('status', 'turning on ALLOW HANDICAPS'), ('press', down, {'count': 2}), ('press', left),
-                ('status', 'closing menu'), ('press', light, {'delay': 0.5}),
-                ('status', 'opening MANAGE PARTY menu'), ('press', throw),
-                ('status', 'adding and opening BOT menu'), ('press', light, {'count': 2, 'delay': 0.5}),
-                ('status', 'set LIVES to 89'), ('press', down), ('press', left, {'count': 10}),
-                ('status', 'set Dmg Done 50%'), ('press', down), ('press', left, {'count': 5}),
-                ('status', 'set Dmg Taken 50%'), ('press', down), ('press', left, {'count': 5}),
-                ('status', 'switching to P1 menu'), ('press', light), ('press', up), ('press', light),
-                ('status', 'set Dmg Done 50%'), ('press', down, {'count': 2}), ('press', left, {'count': 5}),
-                ('status', 'set Dmg Taken 50%'), ('press', down), ('press', left, {'count': 5}),
-                ('status', 'close MANAGE PARTY menu'), ('press', throw)
-            ],
-            'lobby_setup_finish': [
-                ('press', esc),
-                ('status', 'finished lobby setup'),
-            ]
-        }
-
-        action_map = {}
-        for name, steps in sequences_data.items():
-            action_list = []
-            for step in steps:
-                command, args = step[0], step[1:]
-
-                if command == 'status':
-                    action_list.append((lambda l=args[0]: dpg.configure_item('farm_status', label=l), 0))
-
-                elif command == 'wait':
-                    delay_sec = dpg.get_value(args[0]) / 1000
-                    action_list.append((lambda: None, delay_sec))
-
-                elif command == 'countdown':
-                    duration_tag, label_template = args[0], args[1]
-                    duration = dpg.get_value(duration_tag)
-                    for i in range(duration):
-                        label = label_template.format(duration - i)
-                        action_list.append((lambda l=label: dpg.configure_item('farm_status', label=l), 1))
-
-                elif command == 'press':
-                    key = args[0]
-                    overrides = args[1] if len(args) > 1 else {}
-
-                    count_val = overrides.get('count', 1)
-                    num_repeats = dpg.get_value(count_val) if isinstance(count_val, str) else count_val
-
-                    hold_default = overrides.get('hold', dpg.get_value('keypress_hold'))
-                    delay_ms_tag = overrides.get('delay_tag')
-                    delay_after = overrides.get('delay', 0)
-                    if delay_ms_tag and dpg.does_item_exist(delay_ms_tag):
-                        delay_after = dpg.get_value(delay_ms_tag) / 1000
-
-                    for _ in range(num_repeats):
-                        action = (lambda k=key, h=hold_default: self._keypress(hwnd, k, h, dpg.get_value('keypress_delay'), dpg.get_value('direct_input')), delay_after)
-                        action_list.append(action)
-
-            action_map[name] = action_list
-        return action_map
-
-    def action(self, sequences, is_running, hwnd):
-        def scrolls(start, target, pos=25):
-            r_scroll = (target - start) % pos
-            l_scroll = (start - target) % pos
-            return (self.config['key_right'], r_scroll) if r_scroll <= l_scroll else (self.config['key_left'], l_scroll)
-
-        TIME_D, TIME_A = scrolls(20, dpg.get_value('match_time'))
-        MENU_K = win32con.VK_RETURN if dpg.get_value('open_menu_enter') else win32con.VK_ESCAPE
-
-        action_map = self._build(TIME_D, TIME_A, MENU_K, hwnd)
-        actions = [action for seq in sequences if seq in action_map for action in action_map[seq]]
-        for action, delay in actions:
-            if not is_running(): break
-            if dpg.get_value('direct_input'): activate(hwnd)
-            action()
-            if delay >= 1:
-                for _ in range(int(delay)):
-                    if not is_running(): break
-                    time.sleep(1)
-            else:
-                time.sleep(delay)
+        deadline = self.clock.monotonic() + seconds
+        while True:
+            if self.detector.matches(hwnd, screen):
+                return max(0.0, deadline - self.clock.monotonic())
+            left = deadline - self.clock.monotonic()
+            if left <= 0 or not sleep(min(DETECT_POLL_SECONDS, left)):
+                return None
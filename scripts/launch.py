@@ -0,0 +1,102 @@
+"""
+Background launch of Brawlhalla through Steam.
+"""
+
+import time
+import subprocess
+import threading
+import logging
+from typing import Callable, Optional, Any
+import scripts.window as window
+from scripts.constants import (
+    STEAM_LAUNCH_COMMAND,
+    LAUNCH_TIMEOUT_SECONDS,
+    LAUNCH_POLL_INITIAL_SECONDS,
+    LAUNCH_POLL_MAX_SECONDS
+)
+
+logger = logging.getLogger(__name__)
+
+class LaunchJob:
+    """
+    Starts the game and waits for its window on a background thread.
+
+    Progress is reported through on_event(event, data) with these events:
+    'starting', 'waiting' (seconds elapsed), 'ready' (hwnd), 'timeout',
+    'cancelled' and 'error' (message). The window is polled with an
+    exponential backoff, and cancel() interrupts the wait immediately.
+    """
+
+    def __init__(self, on_event: Callable[[str, Any], None], on_ready: Optional[Callable[[int], None]] = None,
+                 timeout: float = LAUNCH_TIMEOUT_SECONDS):
+        self.on_event = on_event
+        self.on_ready = on_ready
+        self.timeout = timeout
+        self._cancel = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        """Whether the job is still launching or waiting for the window."""
+        return bool(self._thread and self._thread.is_alive())
+
+    def start(self) -> None:
+        """Start the launch in the background, does nothing if already running."""
+        if self.running:
+            return
+        self._cancel.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def wait(self, timeout: Optional[float] = None) -> None:
+        """
+        Block until the job finishes.
+
+        Args:
+            timeout: Maximum time to wait in seconds
+        """
+        if self._thread:
+            self._thread.join(timeout)
+
+    def cancel(self) -> None:
+        """Stop waiting for the game window."""
+        self._cancel.set()
+
+    def _emit(self, event: str, data: Any = None) -> None:
+        try:
+            self.on_event(event, data)
+        except Exception as e:
+            logger.error(f"Error in launch event handler: {e}")
+
+    def _run(self) -> None:
+        try:
+            self._emit('starting')
+            subprocess.run(STEAM_LAUNCH_COMMAND, check=False, timeout=10)
+        except subprocess.TimeoutExpired:
+            self._emit('error', 'launch command timed out')
+            return
+        except Exception as e:
+            logger.error(f"Error launching Brawlhalla: {e}")
+            self._emit('error', 'failed to launch brawlhalla')
+            return
+
+        start = time.monotonic()
+        delay = LAUNCH_POLL_INITIAL_SECONDS
+        while not self._cancel.is_set():
+            hwnd = window.find()
+            if hwnd:
+                logger.info(f"Brawlhalla window found after {time.monotonic() - start:.1f}s")
+                if self.on_ready:
+                    self.on_ready(hwnd)
+                self._emit('ready', hwnd)
+                return
+
+            elapsed = time.monotonic() - start
+            if elapsed >= self.timeout:
+                self._emit('timeout')
+                return
+            self._emit('waiting', int(elapsed))
+            self._cancel.wait(min(delay, self.timeout - elapsed))
+            delay = min(delay * 2, LAUNCH_POLL_MAX_SECONDS)
+
+        self._emit('cancelled')
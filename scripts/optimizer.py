@@ -0,0 +1,128 @@
+"""
+Match time optimizer.
+Every cycle pays a fixed overhead (restart, menu spam, game load, disconnect,
+reconnect) on top of the match itself, and exp is capped per rate-limit
+window. This picks the match time that earns the most exp (then gold) per
+wall-clock hour under those two costs.
+"""
+
+import math
+import statistics
+import logging
+from typing import Iterable, NamedTuple, Optional
+from scripts.settings import Settings
+from scripts.constants import (
+    EXP_RATE_LIMIT_THRESHOLD,
+    MIN_MATCH_TIME_MINUTES,
+    MAX_MATCH_TIME_MINUTES
+)
+
+logger = logging.getLogger(__name__)
+
+class Plan(NamedTuple):
+    match_time: int  # minutes
+    cycles: int  # cycles per rate-limit window (0 if the limit is not modelled)
+    exp_per_hour: float
+    gold_per_hour: float
+
+def estimate_overhead(settings: Settings) -> float:
+    """
+    Estimate per-cycle overhead from the configured delays.
+
+    Args:
+        settings: Settings snapshot
+
+    Returns:
+        Overhead in seconds
+    """
+    # KeySequence adds 0-40 ms of random delay after every press
+    press = (settings.keypress_hold + settings.keypress_delay + 20) / 1000
+    presses = settings.game_start_spam + settings.menu_key_presses + 4
+    return (settings.game_restart_delay + settings.game_load_time + settings.reconnect_delay
+            + settings.disconnect_delay / 1000 + settings.menu_key_presses * settings.menu_key_presses_delay / 1000
+            + presses * press)
+
+def measured_overhead(samples: Iterable[float], settings: Settings) -> float:
+    """
+    Median of measured overheads, falling back to the estimate.
+
+    Args:
+        samples: Measured per-cycle overheads in seconds
+        settings: Settings snapshot used for the fallback
+
+    Returns:
+        Overhead in seconds
+    """
+    samples = list(samples)
+    return statistics.median(samples) if samples else estimate_overhead(settings)
+
+def evaluate(match_time: int, overhead: float, settings: Settings,
+             exp_per_minute: float, gold_per_minute: float) -> Plan:
+    """
+    Model the hourly yield of one match time.
+
+    With rate limit detection on, a window is as many cycles as it takes to
+    reach the exp limit plus the reset wait; exp past the limit is lost.
+
+    Args:
+        match_time: Match time in minutes
+        overhead: Per-cycle overhead in seconds
+        settings: Settings snapshot
+        exp_per_minute: Exp per minute of match
+        gold_per_minute: Gold per minute of match
+
+    Returns:
+        Plan for this match time
+    """
+    cycle = match_time * 60 + overhead
+    exp, gold = match_time * exp_per_minute, match_time * gold_per_minute
+    if not settings.rate_limit_detect or exp <= 0:
+        return Plan(match_time, 0, exp * 3600 / cycle, gold * 3600 / cycle)
+
+    cycles = math.ceil(EXP_RATE_LIMIT_THRESHOLD / exp)
+    window = cycles * cycle + (settings.rate_limit_wait_time * 60 if settings.rate_limit_wait else 0)
+    return Plan(match_time, cycles,
+                min(cycles * exp, EXP_RATE_LIMIT_THRESHOLD) * 3600 / window,
+                cycles * gold * 3600 / window)
+
+def recommend(settings: Settings, overhead: float, exp_per_minute: float,
+              gold_per_minute: float) -> Plan:
+    """
+    Pick the match time with the best exp per hour, then gold per hour.
+    Ties go to the longer match, which needs fewer inputs.
+
+    Args:
+        settings: Settings snapshot
+        overhead: Per-cycle overhead in seconds
+        exp_per_minute: Exp per minute of match
+        gold_per_minute: Gold per minute of match
+
+    Returns:
+        Best plan
+    """
+    plans = [evaluate(minutes, overhead, settings, exp_per_minute, gold_per_minute)
+             for minutes in range(MIN_MATCH_TIME_MINUTES, MAX_MATCH_TIME_MINUTES + 1)]
+    best = max(plans, key=lambda plan: (round(plan.exp_per_hour, 3), round(plan.gold_per_hour, 3), plan.match_time))
+    logger.debug(f"Recommended {best.match_time} min ({best.cycles} cycles), "
+                 f"{best.exp_per_hour:.0f} exp/h, {best.gold_per_hour:.0f} gold/h, overhead {overhead:.1f}s")
+    return best
+
+def compare(settings: Settings, overhead: float, exp_per_minute: float,
+            gold_per_minute: float) -> Optional[Plan]:
+    """
+    Recommend a plan only if it beats the current match time.
+
+    Args:
+        settings: Settings snapshot
+        overhead: Per-cycle overhead in seconds
+        exp_per_minute: Exp per minute of match
+        gold_per_minute: Gold per minute of match
+
+    Returns:
+        Better plan, or None to keep the current match time
+    """
+    current = evaluate(settings.match_time, overhead, settings, exp_per_minute, gold_per_minute)
+    best = recommend(settings, overhead, exp_per_minute, gold_per_minute)
+    if best.match_time == current.match_time or best.exp_per_hour <= current.exp_per_hour and best.gold_per_hour <= current.gold_per_hour:
+        return None
+    return best
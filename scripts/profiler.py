@@ -0,0 +1,53 @@
+"""
+Startup profiler: wall-clock time per startup phase up to the first frame.
+"""
+
+import time
+from contextlib import contextmanager
+from typing import List, Tuple, Optional, Iterator
+
+class StartupProfiler:
+    """Collects the duration of each named startup phase."""
+
+    def __init__(self, enabled: bool = False, origin: Optional[float] = None):
+        self.enabled = enabled
+        self.origin = origin if origin is not None else time.perf_counter()
+        self.phases: List[Tuple[str, float]] = []
+
+    def add(self, name: str, seconds: float) -> None:
+        """
+        Record a phase that was timed elsewhere.
+
+        Args:
+            name: Phase name
+            seconds: Phase duration in seconds
+        """
+        self.phases.append((name, seconds))
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """
+        Time the enclosed block as one phase.
+
+        Args:
+            name: Phase name
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start)
+
+    def report(self) -> str:
+        """
+        Format the per-phase breakdown and the total time since the origin.
+
+        Returns:
+            Multi-line report
+        """
+        total = time.perf_counter() - self.origin
+        lines = ['startup profile:']
+        for name, seconds in self.phases:
+            lines.append(f'  {name:<14} {seconds * 1000:8.1f} ms  {seconds / total:6.1%}')
+        lines.append(f'  {"total":<14} {total * 1000:8.1f} ms  (time to first frame)')
+        return '\n'.join(lines)
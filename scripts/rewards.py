@@ -0,0 +1,274 @@
+"""
+Reward screen reader: the gold and exp a match actually awarded.
+The counters on the end of match screen are cut into glyphs, each glyph is
+scaled to GLYPH_SIZE and binarised, and all of them are compared against a
+precomputed index of the game font's digits with one matrix product.
+
+Glyphs are BMP files in res/glyphs named <digit>.bmp or <digit>_<n>.bmp,
+other names (plus.bmp, ...) are matched but contribute no digit.
+Cut them from a captured frame whose counters you know with:
+    python -m scripts.rewards glyphs <frame.bmp> <gold> <exp>
+Check a frame with:  python -m scripts.rewards read <frame.bmp>
+"""
+
+import os
+import re
+import sys
+import logging
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+import numpy as np
+from scripts.detect import capture, read_bmp, write_bmp
+from scripts.constants import (
+    DETECT_POLL_SECONDS,
+    GLYPH_MATCH,
+    GLYPH_SIZE,
+    GLYPHS_PATH,
+    REWARD_READ_SECONDS,
+    REWARD_REGIONS
+)
+
+logger = logging.getLogger(__name__)
+
+_GLYPH_NAME = re.compile(r'^([a-z0-9]+?)(?:_\d+)?\.bmp$', re.IGNORECASE)
+
+# Text needs at least this spread between dark and bright pixels
+MIN_CONTRAST = 64
+# Segments shorter than this share of the tallest are separators (commas, dots)
+MIN_GLYPH_HEIGHT = 0.6
+# Blank pixels around a saved glyph
+GLYPH_BORDER = 2
+
+class Reward(NamedTuple):
+    gold: int
+    exp: int
+
+def _ink(region: np.ndarray) -> Optional[np.ndarray]:
+    """Binarise an RGB crop, True where the bright text is. None if empty or without enough contrast."""
+    if not region.size:
+        return None
+    gray = region[..., 0] * 0.299 + region[..., 1] * 0.587 + region[..., 2] * 0.114
+    low, high = float(gray.min()), float(gray.max())
+    if high - low < MIN_CONTRAST:
+        return None
+    return gray > (low + high) / 2
+
+def segment(ink: np.ndarray) -> List[np.ndarray]:
+    """
+    Split binarised text into glyphs at blank columns.
+
+    Args:
+        ink: Boolean array of shape (height, width)
+
+    Returns:
+        Tight crops of each glyph, left to right, separators dropped
+    """
+    columns = np.flatnonzero(ink.any(axis=0))
+    if not len(columns):
+        return []
+    breaks = np.flatnonzero(np.diff(columns) > 1)
+    starts = np.concatenate(([columns[0]], columns[breaks + 1]))
+    ends = np.concatenate((columns[breaks], [columns[-1]])) + 1
+    glyphs = []
+    for start, end in zip(starts, ends):
+        rows = np.flatnonzero(ink[:, start:end].any(axis=1))
+        glyphs.append(ink[rows[0]:rows[-1] + 1, start:end])
+    tallest = max(glyph.shape[0] for glyph in glyphs)
+    return [glyph for glyph in glyphs if glyph.shape[0] >= tallest * MIN_GLYPH_HEIGHT]
+
+def normalise(glyph: np.ndarray, size: Tuple[int, int] = GLYPH_SIZE) -> np.ndarray:
+    """
+    Scale a glyph with nearest neighbour sampling to a +1/-1 vector.
+
+    Args:
+        glyph: Boolean array
+        size: Output (width, height)
+
+    Returns:
+        Float32 vector of length width * height
+    """
+    width, height = size
+    ys = np.arange(height) * glyph.shape[0] // height
+    xs = np.arange(width) * glyph.shape[1] // width
+    return np.where(glyph[np.ix_(ys, xs)], 1.0, -1.0).astype(np.float32).ravel()
+
+def crop(frame: np.ndarray, box: Tuple[float, float, float, float]) -> np.ndarray:
+    """Cut a (left, top, right, bottom) fractional box out of a frame."""
+    height, width = frame.shape[:2]
+    left, top, right, bottom = box
+    return frame[int(top * height):int(bottom * height), int(left * width):int(right * width)]
+
+class GlyphIndex:
+    """Digit glyphs of the game font, one row per glyph."""
+
+    def __init__(self, glyphs: Dict[str, List[np.ndarray]], threshold: float = GLYPH_MATCH):
+        self.threshold = threshold
+        self.labels: List[str] = []
+        vectors = []
+        for name, images in glyphs.items():
+            for ink in images:
+                self.labels.append(name)
+                vectors.append(normalise(ink))
+        self.matrix = np.stack(vectors) if vectors else np.zeros((0, GLYPH_SIZE[0] * GLYPH_SIZE[1]), np.float32)
+        self.digits = frozenset(label for label in self.labels if label.isdigit())
+
+    @classmethod
+    def from_folder(cls, folder: str, threshold: float = GLYPH_MATCH) -> 'GlyphIndex':
+        """
+        Load every glyph BMP in a folder.
+
+        Args:
+            folder: Glyph folder
+            threshold: Minimum fraction of agreeing pixels for a match
+
+        Returns:
+            GlyphIndex, empty if the folder is missing
+        """
+        glyphs: Dict[str, List[np.ndarray]] = {}
+        if os.path.isdir(folder):
+            for filename in sorted(os.listdir(folder)):
+                match = _GLYPH_NAME.match(filename)
+                if not match:
+                    continue
+                try:
+                    ink = _ink(read_bmp(os.path.join(folder, filename)))
+                except (OSError, ValueError) as e:
+                    logger.warning(f"Skipping glyph {filename}: {e}")
+                    continue
+                if ink is None or not ink.any():
+                    logger.warning(f"Skipping glyph {filename}: no text found")
+                    continue
+                rows, cols = np.flatnonzero(ink.any(axis=1)), np.flatnonzero(ink.any(axis=0))
+                glyphs.setdefault(match.group(1).lower(), []).append(
+                    ink[rows[0]:rows[-1] + 1, cols[0]:cols[-1] + 1])
+        logger.info(f"Loaded {sum(map(len, glyphs.values()))} glyphs for {sorted(glyphs)}")
+        return cls(glyphs, threshold)
+
+    def read(self, glyphs: List[np.ndarray]) -> Optional[int]:
+        """
+        Read a number from segmented glyphs.
+
+        Args:
+            glyphs: Glyph crops from segment()
+
+        Returns:
+            The number, None if any glyph matches nothing well enough
+        """
+        if not glyphs or not len(self.labels):
+            return None
+        vectors = np.stack([normalise(glyph) for glyph in glyphs])
+        # Dot product of +1/-1 vectors -> fraction of agreeing pixels
+        agreement = (vectors @ self.matrix.T + vectors.shape[1]) / (2 * vectors.shape[1])
+        best = agreement.argmax(axis=1)
+        if (agreement[np.arange(len(best)), best] < self.threshold).any():
+            return None
+        digits = ''.join(label for label in (self.labels[i] for i in best) if label.isdigit())
+        return int(digits) if digits else None
+
+class RewardReader:
+    """
+    Reads the gold and exp counters from the end of match screen.
+    """
+
+    def __init__(self, folder: str = GLYPHS_PATH, regions: Dict[str, Tuple[float, float, float, float]] = REWARD_REGIONS):
+        self.index = GlyphIndex.from_folder(folder)
+        self.regions = regions
+        self.reads = 0
+        self.failures = 0
+
+    @property
+    def available(self) -> bool:
+        """True once the index has all ten digits, otherwise rewards are estimated."""
+        return len(self.index.digits) == 10
+
+    def read(self, frame: np.ndarray) -> Optional[Reward]:
+        """
+        Read the rewards from one frame.
+
+        Args:
+            frame: RGB array of the client area
+
+        Returns:
+            Reward, None if either counter can't be read
+        """
+        values = {}
+        for name in ('gold', 'exp'):
+            ink = _ink(crop(frame, self.regions[name]))
+            value = self.index.read(segment(ink)) if ink is not None else None
+            if value is None:
+                return None
+            values[name] = value
+        return Reward(**values)
+
+    def wait(self, hwnd: int, sleep: Callable[[float], bool], timeout: float = REWARD_READ_SECONDS) -> Optional[Reward]:
+        """
+        Poll the window until the same reward is read twice in a row,
+        so counters that are still counting up are not taken.
+
+        Args:
+            hwnd: Window handle
+            sleep: Sleep function returning False once stopped
+            timeout: Seconds to keep looking
+
+        Returns:
+            Reward, None if the screen was not read in time
+        """
+        previous = None
+        for _ in range(max(1, int(timeout / DETECT_POLL_SECONDS))):
+            frame = capture(hwnd)
+            reward = self.read(frame) if frame is not None else None
+            if reward is not None and reward == previous:
+                self.reads += 1
+                return reward
+            previous = reward
+            if not sleep(DETECT_POLL_SECONDS):
+                return None
+        self.failures += 1
+        logger.warning("Reward screen not read, using estimated rewards")
+        return None
+
+def cut_glyphs(frame: np.ndarray, known: Dict[str, int], folder: str,
+               regions: Dict[str, Tuple[float, float, float, float]] = REWARD_REGIONS) -> List[str]:
+    """
+    Save the digit glyphs of a frame whose counters are known.
+
+    Args:
+        frame: RGB array of the end of match screen
+        known: Counter values shown, by region name
+        folder: Glyph folder to write to
+        regions: Counter regions
+
+    Returns:
+        Paths of the written glyphs
+
+    Raises:
+        ValueError: If a counter does not split into as many glyphs as it has digits
+    """
+    os.makedirs(folder, exist_ok=True)
+    written = []
+    for name, value in known.items():
+        ink = _ink(crop(frame, regions[name]))
+        glyphs = segment(ink) if ink is not None else []
+        digits = str(value)
+        if len(glyphs) != len(digits):
+            raise ValueError(f"{name}: found {len(glyphs)} glyphs for {digits}, check REWARD_REGIONS")
+        for digit, glyph in zip(digits, glyphs):
+            index = len([f for f in os.listdir(folder) if f.split('_')[0].split('.')[0] == digit])
+            path = os.path.join(folder, f'{digit}_{index}.bmp')
+            # A blank border keeps the contrast a glyph filling its whole crop would lack on load
+            image = np.pad(glyph, GLYPH_BORDER).astype(np.uint8) * np.uint8(255)
+            write_bmp(path, np.repeat(image[..., None], 3, axis=2))
+            written.append(path)
+    return written
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    # The folder the app loads glyphs from (next to main.py), wherever this is run from
+    glyphs = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), GLYPHS_PATH)
+    if len(sys.argv) == 3 and sys.argv[1] == 'read':
+        reward = RewardReader(glyphs).read(read_bmp(sys.argv[2]))
+        print(f"gold {reward.gold}, exp {reward.exp}" if reward else 'not read')
+    elif len(sys.argv) == 5 and sys.argv[1] == 'glyphs':
+        paths = cut_glyphs(read_bmp(sys.argv[2]), {'gold': int(sys.argv[3]), 'exp': int(sys.argv[4])}, glyphs)
+        print(f"saved {len(paths)} glyphs to {glyphs}")
+    else:
+        sys.exit('usage: python -m scripts.rewards read <frame.bmp> | glyphs <frame.bmp> <gold> <exp>')
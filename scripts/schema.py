@@ -0,0 +1,158 @@
+"""
+Settings schema.
+One table describes every setting: its config key, widget tag, type, range
+and default. DEFAULT_CONFIG, WIDGET_TAGS, the per-key validators used when
+loading, saving and snapshotting settings, and the slider ranges of the GUI
+are all generated from it.
+"""
+
+import logging
+from typing import Any, Callable, Dict, NamedTuple, Optional, Union
+from scripts.constants import (
+    DEFAULT_MATCH_TIME_MINUTES,
+    MIN_MATCH_TIME_MINUTES,
+    MAX_MATCH_TIME_MINUTES,
+    DEFAULT_RATE_LIMIT_WAIT_TIME_MINUTES,
+    DEFAULT_KEYPRESS_HOLD_MS,
+    DEFAULT_KEYPRESS_DELAY_MS,
+    DEFAULT_BEEP_FREQUENCY,
+    DEFAULT_BEEP_DURATION_MS
+)
+
+logger = logging.getLogger(__name__)
+
+Number = Union[int, float]
+
+class Field(NamedTuple):
+    key: str  # config.ini key and Settings attribute
+    tag: str  # DearPyGui widget holding the value
+    type: type
+    default: Any
+    min: Optional[Number] = None
+    max: Optional[Number] = None
+
+SCHEMA = (
+    Field('match_time', 'match_time', int, DEFAULT_MATCH_TIME_MINUTES, MIN_MATCH_TIME_MINUTES, MAX_MATCH_TIME_MINUTES),
+    Field('timer_sound', 'timer_sound', bool, False),
+    Field('always_on_top', 'always_on_top', bool, True),
+    Field('game_start_spam', 'start_spam', int, 12, 0, 20),
+    Field('game_restart_delay', 'wait_restart', int, 4, 0, 30),
+    Field('game_load_time', 'wait_gameload', int, 15, 10, 30),
+    Field('menu_key_presses', 'menu_key_presses', int, 2, 1, 6),
+    Field('menu_key_presses_delay', 'menu_key_presses_delay', int, 0, 0, 1000),
+    Field('disconnect_delay', 'wait_disconnect', int, 100, 100, 1000),
+    Field('reconnect_delay', 'wait_reconnect', int, 4, 3, 20),
+    Field('open_menu_default', 'open_menu_default', bool, True),
+    Field('open_menu_fix', 'open_menu_fix', bool, False),
+    Field('open_menu_fix2', 'open_menu_fix2', bool, False),
+    Field('open_menu_hold', 'open_menu_hold', bool, False),
+    Field('open_menu_enter', 'open_menu_enter', bool, True),
+    Field('direct_input', 'direct_input', bool, False),
+    Field('keypress_hold', 'keypress_hold', int, DEFAULT_KEYPRESS_HOLD_MS, 0, 300),
+    Field('keypress_delay', 'keypress_delay', int, DEFAULT_KEYPRESS_DELAY_MS, 0, 500),
+    Field('beep_frequency', 'beep_frequency', int, DEFAULT_BEEP_FREQUENCY, 100, 2000),
+    Field('beep_duration', 'beep_duration', int, DEFAULT_BEEP_DURATION_MS, 10, 1000),
+    Field('rate_limit_detect', 'rate_limit_detect', bool, True),
+    Field('rate_limit_wait', 'rate_limit_wait', bool, True),
+    Field('rate_limit_wait_time', 'rate_limit_wait_time', int, DEFAULT_RATE_LIMIT_WAIT_TIME_MINUTES, 30, 60),
+    Field('max_games', 'max_games', bool, False),
+    Field('max_games_amount', 'max_games_amount', int, 16, 1, 99),
+    Field('auto_match_time', 'auto_match_time', bool, False),
+    Field('pixel_search', 'pixel_search', bool, False),
+    Field('adaptive_waits', 'adaptive_waits', bool, False),
+    Field('auto_launch', 'auto_launch', bool, False),
+    Field('key_light', 'key_light', str, 'c'),
+    Field('key_heavy', 'key_heavy', str, 'x'),
+    Field('key_throw', 'key_throw', str, 'v'),
+    Field('key_left', 'key_left', str, 'left'),
+    Field('key_up', 'key_up', str, 'up'),
+    Field('key_right', 'key_right', str, 'right'),
+    Field('key_down', 'key_down', str, 'down'),
+)
+
+FIELDS: Dict[str, Field] = {field.key: field for field in SCHEMA}
+# Default configuration values
+DEFAULT_CONFIG: Dict[str, Any] = {field.key: field.default for field in SCHEMA}
+# Config key -> DearPyGui widget tag holding its value
+WIDGET_TAGS: Dict[str, str] = {field.key: field.tag for field in SCHEMA}
+
+_TRUE = frozenset(('1', 'true', 'yes', 'on'))
+_FALSE = frozenset(('0', 'false', 'no', 'off'))
+
+def _to_bool(value: Any) -> bool:
+    if isinstance(value, str):
+        text = value.strip().lower()
+        if text in _TRUE:
+            return True
+        if text in _FALSE:
+            return False
+        raise ValueError(f"not a boolean: {value!r}")
+    return bool(value)
+
+def _to_number(kind: type) -> Callable[[Any], Number]:
+    def convert(value: Any) -> Number:
+        if isinstance(value, bool):
+            raise TypeError(f"not a number: {value!r}")
+        if isinstance(value, str):
+            value = float(value.strip())
+        return kind(value)
+    return convert
+
+def _compile(field: Field) -> Callable[[Any], Any]:
+    """Build the validator for one field: convert, then clamp to its range."""
+    convert = _to_bool if field.type is bool else _to_number(field.type) if field.type in (int, float) else str
+    low, high, key, default = field.min, field.max, field.key, field.default
+
+    def validate(value: Any) -> Any:
+        try:
+            value = convert(value)
+        except (ValueError, TypeError, OverflowError):
+            logger.warning(f"Invalid setting value for {key}: {value!r}, using default")
+            return default
+        if low is not None and value < low:
+            logger.warning(f"Setting {key}={value} below minimum {low}, clamping")
+            return low
+        if high is not None and value > high:
+            logger.warning(f"Setting {key}={value} above maximum {high}, clamping")
+            return high
+        return value
+    return validate
+
+# Precomputed per-key validators
+VALIDATORS: Dict[str, Callable[[Any], Any]] = {field.key: _compile(field) for field in SCHEMA}
+
+def validate(key: str, value: Any) -> Any:
+    """
+    Convert a value to its setting's type and clamp it to the setting's range.
+
+    Args:
+        key: Config key
+        value: Raw value (widget value, INI string, ...)
+
+    Returns:
+        Valid value, the default if it can't be converted
+
+    Raises:
+        KeyError: If the key is not in the schema
+    """
+    return VALIDATORS[key](value)
+
+def widget(key: str, values: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Keyword arguments for the widget of a setting: tag, current value and,
+    for numbers, the slider range.
+
+    Args:
+        key: Config key
+        values: Current configuration values
+
+    Returns:
+        Dictionary to pass to the DearPyGui add_* call
+    """
+    field = FIELDS[key]
+    kwargs = {'tag': field.tag, 'default_value': validate(key, values.get(key, field.default))}
+    if field.min is not None:
+        kwargs['min_value'] = field.min
+    if field.max is not None:
+        kwargs['max_value'] = field.max
+    return kwargs
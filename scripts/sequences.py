@@ -0,0 +1,339 @@
+"""
+Declarative key sequences.
+res/sequences.json describes every farming and lobby setup sequence as data.
+The file is validated once when it is loaded, compiled into immutable steps
+per settings snapshot, and reloaded automatically when it changes on disk.
+
+Step forms:
+    {"status": "text {setting}"}                  show a status label
+    {"wait": "setting"}                           wait for a setting's value in ms
+    {"countdown": "setting", "label": "x {}"}     count down a setting's seconds
+    {"wait"/"countdown": ..., "until": "screen"}  end early once pixel search sees the screen,
+                                                  the time it took feeds adaptive waits
+    {"press": "key", "count": 2 | "setting",      press a key, optional repeat count,
+     "hold": ms, "delay": s, "delay_key": "setting"}  hold override and delay after
+
+Keys are the bound names (light, heavy, throw, left, up, right, down), menu
+(enter or esc depending on open_menu_enter), esc, match_scroll (the direction
+that reaches match_time fastest, its count is also called match_scroll) or
+a single literal character.
+"""
+
+import os
+import json
+import string
+import threading
+import logging
+from typing import Dict, Any, List, Tuple, Optional, FrozenSet
+from scripts.settings import Settings
+from scripts.schema import DEFAULT_CONFIG
+from scripts.constants import (
+    MAX_MATCH_TIME_MINUTES,
+    LOBBY_DEFAULT_MATCH_TIME_MINUTES,
+    SEQUENCES_PATH,
+    VK_RETURN,
+    VK_ESCAPE
+)
+
+logger = logging.getLogger(__name__)
+
+SEQUENCE_VERSION = 1
+
+# Step opcodes
+STATUS, WAIT, COUNTDOWN, PRESS = range(4)
+
+class Step:
+    """
+    One compiled instruction. Repeats and countdowns stay a single step:
+    PRESS repeats `repeat` times, COUNTDOWN ticks `repeat` seconds.
+
+    key: key to press, the status text, or the countdown label template
+    hold: key hold in ms, gap: keypress delay in ms, delay: wait after each repeat in seconds
+    until: screen that ends a WAIT or COUNTDOWN early when pixel search is on
+    source: setting a WAIT or COUNTDOWN length comes from, its adaptive wait history key
+    """
+
+    __slots__ = ('op', 'key', 'repeat', 'hold', 'gap', 'delay', 'until', 'source')
+
+    def __init__(self, op: int, key: Any = None, repeat: int = 1, hold: int = 0, gap: int = 0, delay: float = 0.0,
+                 until: Optional[str] = None, source: Optional[str] = None):
+        self.op = op
+        self.key = key
+        self.repeat = repeat
+        self.hold = hold
+        self.gap = gap
+        self.delay = delay
+        self.until = until
+        self.source = source
+
+    def as_tuple(self) -> Tuple[int, Any, int, int, int, float, Optional[str], Optional[str]]:
+        """Plain tuple form, for comparing and serialising plans."""
+        return (self.op, self.key, self.repeat, self.hold, self.gap, self.delay, self.until, self.source)
+
+    def __reduce__(self):
+        return (Step, self.as_tuple())
+
+    def __eq__(self, other: Any) -> bool:
+        return isinstance(other, Step) and self.as_tuple() == other.as_tuple()
+
+    def __repr__(self) -> str:
+        return f'Step{self.as_tuple()}'
+
+BOUND_KEYS = ('light', 'heavy', 'throw', 'left', 'up', 'right', 'down')
+# Sequences the farming loop, match time changes and lobby setup run by name
+REQUIRED_SEQUENCES = (
+    'wait_restart', 'spam_menu', 'open_menu', 'open_menu_fix', 'open_menu_hold', 'disconnect', 'reconnect',
+    'set_match_time', 'lobby_setup_game_rules', 'lobby_setup_lobby', 'lobby_setup_finish',
+)
+SPECIAL_KEYS = ('menu', 'esc', 'match_scroll')
+
+# Fields allowed per step opcode, the opcode itself comes first
+STEP_FIELDS = {
+    'status': ('status',),
+    'wait': ('wait', 'until'),
+    'countdown': ('countdown', 'label', 'until'),
+    'press': ('press', 'count', 'hold', 'delay', 'delay_key'),
+}
+
+class SequenceError(ValueError):
+    """Raised when a sequence file does not validate."""
+
+class SequenceSpec:
+    """A validated sequence file."""
+
+    def __init__(self, sequences: Dict[str, List[Dict[str, Any]]], fields: FrozenSet[str], revision: int = 0):
+        self.sequences = sequences
+        # Settings the sequences read, part of the compiled plan's cache key
+        self.fields = fields
+        self.revision = revision
+
+def _setting(value: Any, where: str) -> str:
+    """Check that a step refers to an existing integer setting."""
+    if not isinstance(value, str) or value not in DEFAULT_CONFIG:
+        raise SequenceError(f"{where}: unknown setting {value!r}")
+    if isinstance(DEFAULT_CONFIG[value], bool) or not isinstance(DEFAULT_CONFIG[value], int):
+        raise SequenceError(f"{where}: setting {value!r} is not a number")
+    return value
+
+def _format_fields(text: str, where: str) -> List[str]:
+    """Return the named fields of a status template, all must be settings."""
+    try:
+        names = [name for _, name, _, _ in string.Formatter().parse(text) if name is not None]
+    except ValueError as e:
+        raise SequenceError(f"{where}: bad template {text!r}: {e}")
+    for name in names:
+        if name not in DEFAULT_CONFIG:
+            raise SequenceError(f"{where}: unknown setting {{{name}}} in {text!r}")
+    return names
+
+def validate(data: Any) -> SequenceSpec:
+    """
+    Validate a parsed sequence file.
+
+    Args:
+        data: Parsed JSON document
+
+    Returns:
+        SequenceSpec
+
+    Raises:
+        SequenceError: On an unknown version, opcode, field, key, setting, a bad count
+            or a missing required sequence
+    """
+    if not isinstance(data, dict) or set(data) != {'version', 'sequences'}:
+        raise SequenceError("expected an object with 'version' and 'sequences'")
+    if data['version'] != SEQUENCE_VERSION:
+        raise SequenceError(f"unsupported version {data['version']!r}, expected {SEQUENCE_VERSION}")
+    if not isinstance(data['sequences'], dict) or not data['sequences']:
+        raise SequenceError("'sequences' must be a non-empty object")
+    missing = [name for name in REQUIRED_SEQUENCES if name not in data['sequences']]
+    if missing:
+        raise SequenceError(f"missing sequence(s) {', '.join(missing)}")
+
+    fields = set()
+    for name, steps in data['sequences'].items():
+        if not isinstance(steps, list):
+            raise SequenceError(f"{name}: expected a list of steps")
+        for index, step in enumerate(steps):
+            where = f"{name}[{index}]"
+            if not isinstance(step, dict):
+                raise SequenceError(f"{where}: expected an object")
+            ops = [op for op in STEP_FIELDS if op in step]
+            if len(ops) != 1:
+                raise SequenceError(f"{where}: needs exactly one of {', '.join(STEP_FIELDS)}")
+            op = ops[0]
+            unknown = set(step) - set(STEP_FIELDS[op])
+            if unknown:
+                raise SequenceError(f"{where}: unknown field(s) {', '.join(sorted(unknown))} for {op}")
+
+            if 'until' in step and (not isinstance(step['until'], str) or not step['until'].isidentifier()):
+                raise SequenceError(f"{where}: until must be a screen name")
+
+            if op == 'status':
+                if not isinstance(step['status'], str):
+                    raise SequenceError(f"{where}: status must be text")
+                fields.update(_format_fields(step['status'], where))
+            elif op == 'wait':
+                fields.add(_setting(step['wait'], where))
+            elif op == 'countdown':
+                fields.add(_setting(step['countdown'], where))
+                label = step.get('label')
+                if not isinstance(label, str) or '{}' not in label:
+                    raise SequenceError(f"{where}: countdown needs a label with {{}}")
+                try:
+                    # Formatted with the seconds left while the countdown runs
+                    label.format(0)
+                except (KeyError, IndexError, ValueError) as e:
+                    raise SequenceError(f"{where}: bad countdown label {label!r}: {e!r}")
+            else:
+                key = step['press']
+                if not isinstance(key, str) or (key not in BOUND_KEYS + SPECIAL_KEYS and len(key) != 1):
+                    raise SequenceError(f"{where}: unknown key {key!r}")
+                count = step.get('count', 1)
+                if isinstance(count, str):
+                    if count != 'match_scroll':
+                        fields.add(_setting(count, where))
+                elif isinstance(count, bool) or not isinstance(count, int) or count < 0:
+                    raise SequenceError(f"{where}: count must be a non-negative integer or a setting")
+                hold = step.get('hold', 0)
+                if isinstance(hold, bool) or not isinstance(hold, int) or hold < 0:
+                    raise SequenceError(f"{where}: hold must be a non-negative integer (ms)")
+                delay = step.get('delay', 0)
+                if isinstance(delay, bool) or not isinstance(delay, (int, float)) or delay < 0:
+                    raise SequenceError(f"{where}: delay must be a non-negative number (s)")
+                if 'delay_key' in step:
+                    fields.add(_setting(step['delay_key'], where))
+    return SequenceSpec(data['sequences'], frozenset(fields))
+
+def load(filepath: str) -> SequenceSpec:
+    """
+    Read and validate a sequence file.
+
+    Args:
+        filepath: Path to the JSON file
+
+    Returns:
+        SequenceSpec
+
+    Raises:
+        SequenceError: If the file can't be read or does not validate
+    """
+    try:
+        with open(filepath, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError) as e:
+        raise SequenceError(f"could not read {filepath}: {e}")
+    return validate(data)
+
+def _scroll(settings: Settings, start: int, target: int) -> Tuple[Any, int]:
+    """Key and press count that move the match time slider from start to target."""
+    right = (target - start) % MAX_MATCH_TIME_MINUTES
+    left = (start - target) % MAX_MATCH_TIME_MINUTES
+    return (settings.key_right, right) if right <= left else (settings.key_left, left)
+
+def compile_sequences(spec: SequenceSpec, settings: Settings, names: Optional[List[str]] = None,
+                      scroll_from: int = LOBBY_DEFAULT_MATCH_TIME_MINUTES) -> Dict[str, Tuple[Step, ...]]:
+    """
+    Compile sequences into immutable step tuples for one settings snapshot.
+
+    Args:
+        spec: Validated sequences
+        settings: Snapshot providing key bindings, timings and referenced settings
+        names: Sequences to compile, defaults to all
+        scroll_from: Match time the game rules currently show, for match_scroll
+
+    Returns:
+        Dictionary mapping sequence names to compiled steps
+    """
+    values = settings.as_dict()
+    scroll_key, scroll_count = _scroll(settings, scroll_from, settings.match_time)
+    keys = {name: values[f'key_{name}'] for name in BOUND_KEYS}
+    keys['menu'] = VK_RETURN if settings.open_menu_enter else VK_ESCAPE
+    keys['esc'] = VK_ESCAPE
+    keys['match_scroll'] = scroll_key
+    gap = settings.keypress_delay
+
+    plan = {}
+    for name, steps in spec.sequences.items():
+        if names is not None and name not in names:
+            continue
+        compiled: List[Step] = []
+        for step in steps:
+            if 'status' in step:
+                compiled.append(Step(STATUS, step['status'].format(**values)))
+            elif 'wait' in step:
+                compiled.append(Step(WAIT, delay=values[step['wait']] / 1000, until=step.get('until'),
+                                     source=step['wait']))
+            elif 'countdown' in step:
+                compiled.append(Step(COUNTDOWN, step['label'], values[step['countdown']], until=step.get('until'),
+                                     source=step['countdown']))
+            else:
+                key = keys.get(step['press'], step['press'])
+                count = step.get('count', 1)
+                if count == 'match_scroll':
+                    count = scroll_count
+                elif isinstance(count, str):
+                    count = values[count]
+                delay = values[step['delay_key']] / 1000 if 'delay_key' in step else step.get('delay', 0)
+                if count:
+                    compiled.append(Step(PRESS, key, count, step.get('hold', settings.keypress_hold), gap, delay))
+        plan[name] = tuple(compiled)
+    return plan
+
+def bound_keys(settings: Settings) -> List[Any]:
+    """Every key the sequences can press for these settings, for backend.prepare()."""
+    return [getattr(settings, f'key_{name}') for name in BOUND_KEYS] + [VK_RETURN, VK_ESCAPE, ']']
+
+class SequenceSource:
+    """
+    The current SequenceSpec, reloaded when the file's modification time changes.
+    A file that stops validating is logged and the last good spec stays in use.
+    If no valid file was ever loaded the spec is empty and `error` says why,
+    the timer refuses to start until the file is fixed.
+    """
+
+    def __init__(self, filepath: str = SEQUENCES_PATH):
+        self.filepath = filepath
+        self._lock = threading.Lock()
+        self._mtime = self._stat()
+        self.reloads = 0
+        self.error: Optional[str] = None
+        try:
+            self.spec = load(filepath)
+        except SequenceError as e:
+            logger.error(f"Sequence file not loaded: {e}")
+            self.error = str(e)
+            self.spec = SequenceSpec({}, frozenset())
+
+    def _stat(self) -> Optional[float]:
+        try:
+            return os.stat(self.filepath).st_mtime_ns
+        except OSError:
+            return None
+
+    def current(self) -> SequenceSpec:
+        """
+        Return the spec, reloading it first if the file changed.
+
+        Returns:
+            The latest valid SequenceSpec
+        """
+        mtime = self._stat()
+        if mtime == self._mtime or mtime is None:
+            return self.spec
+        with self._lock:
+            if mtime != self._mtime:
+                self._mtime = mtime
+                try:
+                    spec = load(self.filepath)
+                except SequenceError as e:
+                    logger.error(f"Sequence file not reloaded: {e}")
+                    if self.error is not None:
+                        self.error = str(e)
+                    return self.spec
+                self.reloads += 1
+                spec.revision = self.reloads
+                self.spec = spec
+                self.error = None
+                logger.info(f"Reloaded sequences from {self.filepath}")
+        return self.spec
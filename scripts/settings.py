@@ -0,0 +1,122 @@
+"""
+Immutable settings snapshots for the input and timer threads.
+The GUI thread builds a new snapshot whenever a value changes and swaps it
+in with a single reference assignment, so worker threads never read
+DearPyGui state while they are timing keys.
+"""
+
+import inspect
+import threading
+import logging
+from typing import Dict, Any, List, Optional, Callable
+from scripts.schema import DEFAULT_CONFIG, WIDGET_TAGS, VALIDATORS
+
+logger = logging.getLogger(__name__)
+
+class Settings:
+    """Typed, read-only snapshot of every setting in DEFAULT_CONFIG."""
+
+    __slots__ = tuple(DEFAULT_CONFIG)
+
+    def __init__(self, values: Dict[str, Any]):
+        for key, validate in VALIDATORS.items():
+            object.__setattr__(self, key, validate(values[key]) if key in values else DEFAULT_CONFIG[key])
+
+    def __setattr__(self, key: str, value: Any) -> None:
+        raise AttributeError('Settings snapshots are immutable, use replace()')
+
+    def replace(self, **changes: Any) -> 'Settings':
+        """
+        Return a new snapshot with some values changed.
+
+        Args:
+            **changes: Setting values to replace
+
+        Returns:
+            New Settings instance
+        """
+        values = self.as_dict()
+        values.update(changes)
+        return Settings(values)
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Return the snapshot as a plain dictionary."""
+        return {key: getattr(self, key) for key in self.__slots__}
+
+class SettingsStore:
+    """Holds the current Settings snapshot and swaps it atomically on change."""
+
+    def __init__(self, values: Dict[str, Any]):
+        self.current = Settings(values)
+        self._lock = threading.Lock()
+        self._listeners: List[Callable[[str, Any], None]] = []
+
+    def subscribe(self, listener: Callable[[str, Any], None]) -> None:
+        """
+        Call a function with (key, value) whenever a setting changes.
+
+        Args:
+            listener: Called from the thread that made the change
+        """
+        self._listeners.append(listener)
+
+    def _notify(self, changes: Dict[str, Any]) -> None:
+        for key, value in changes.items():
+            for listener in self._listeners:
+                listener(key, value)
+
+    def update(self, key: str, value: Any) -> None:
+        """
+        Swap in a snapshot with one value changed.
+
+        Args:
+            key: Config key
+            value: New value
+        """
+        if key not in WIDGET_TAGS:
+            logger.warning(f"Unknown setting: {key}")
+            return
+        with self._lock:
+            previous = getattr(self.current, key)
+            self.current = self.current.replace(**{key: value})
+            value = getattr(self.current, key)
+        if value != previous:
+            self._notify({key: value})
+
+    def capture(self) -> Settings:
+        """
+        Read every widget and swap in a fresh snapshot (GUI thread only).
+
+        Returns:
+            The new snapshot
+        """
+        import dearpygui.dearpygui as dpg
+
+        with self._lock:
+            previous = self.current
+            values = previous.as_dict()
+            for key, tag in WIDGET_TAGS.items():
+                if dpg.does_item_exist(tag):
+                    values[key] = dpg.get_value(tag)
+            self.current = current = Settings(values)
+        self._notify({key: getattr(current, key) for key in WIDGET_TAGS
+                      if getattr(current, key) != getattr(previous, key)})
+        return current
+
+    def bind_widgets(self) -> None:
+        """Keep the snapshot in sync with edits made to the settings widgets."""
+        import dearpygui.dearpygui as dpg
+
+        for key, tag in WIDGET_TAGS.items():
+            if dpg.does_item_exist(tag):
+                dpg.set_item_callback(tag, self._edited(key, dpg.get_item_callback(tag)))
+
+    def _edited(self, key: str, original: Optional[Callable]) -> Callable:
+        """Wrap a widget callback so edits update the snapshot first."""
+        arg_count = len(inspect.signature(original).parameters) if original else 0
+
+        def callback(sender, app_data, user_data):
+            self.update(key, app_data)
+            if original:
+                original(*(sender, app_data, user_data)[:arg_count])
+        return callback
@@ -0,0 +1,195 @@
+"""
+Discrete-event simulator of the farming loop.
+Runs the real Timer and KeySequence on a VirtualClock against a fake window
+and a RecordingBackend, so days of farming finish in well under a second.
+Run with: python -m scripts.simulate --hours 24
+"""
+
+import re
+import argparse
+import logging
+from typing import Dict, Any, List, Optional, Tuple, NamedTuple
+from scripts.backends import RecordingBackend
+from scripts.clock import VirtualClock
+from scripts.schema import DEFAULT_CONFIG
+from scripts.input import KeySequence, farm_sequence
+from scripts.settings import SettingsStore
+from scripts.timer import Timer
+
+logger = logging.getLogger(__name__)
+
+# Any non-zero handle, the recording backend never looks at it
+FAKE_HWND = 0x5EED
+
+class Cycle(NamedTuple):
+    start: float  # first input of the cycle
+    match_start: float  # countdown of the match begins
+    end: float  # cycle completed
+    games: int  # total games after this cycle
+
+class TimelineUI:
+    """
+    UIQueue stand-in that records status phase changes against the virtual clock.
+    Labels that differ only in their numbers are one phase, so per-second
+    countdown updates cost a regex and a comparison.
+    """
+
+    def __init__(self, clock: VirtualClock):
+        self.clock = clock
+        self.phases: List[Tuple[float, str]] = []
+        self.completions: List[Tuple[float, int]] = []
+        self._phase: Optional[str] = None
+
+    def configure(self, tag: str, **kwargs: Any) -> None:
+        label = kwargs.get('label')
+        if tag == 'farm_status' and label is not None:
+            self.status(label)
+        elif tag == 'total_games' and label is not None:
+            self.completions.append((self.clock.monotonic(), int(label)))
+
+    def set_value(self, tag: str, value: Any) -> None:
+        pass
+
+    def status(self, label: str) -> None:
+        phase = re.sub(r'\d+', '#', label)
+        if phase != self._phase:
+            self._phase = phase
+            self.phases.append((self.clock.monotonic(), phase))
+
+    def drain(self) -> int:
+        return 0
+
+class SimulationResult:
+    """Timeline and throughput of one simulated session."""
+
+    def __init__(self, ui: TimelineUI, state: Dict[str, Any], duration: float, stop_reason: str):
+        self.duration = duration
+        self.stop_reason = stop_reason
+        self.games = state['total_games']
+        self.gold = state['total_gold']
+        self.exp = state['total_exp']
+        self.phase_time = self._phase_time(ui.phases, duration)
+        self.cycles = self._cycles(ui)
+
+    @staticmethod
+    def _phase_time(phases: List[Tuple[float, str]], duration: float) -> Dict[str, float]:
+        """Total time spent showing each status phase."""
+        totals: Dict[str, float] = {}
+        ends = [t for t, _ in phases[1:]] + [duration]
+        for (start, phase), end in zip(phases, ends):
+            totals[phase] = totals.get(phase, 0.0) + end - start
+        return totals
+
+    @staticmethod
+    def _cycles(ui: TimelineUI) -> List[Cycle]:
+        """Split the phase timeline into cycles at every completion."""
+        cycles = []
+        phases = iter(ui.phases)
+        start = match_start = None
+        for end, games in ui.completions:
+            for t, phase in phases:
+                if start is None and not phase.startswith('exp rate limit'):
+                    start = t
+                if phase.startswith('active'):
+                    match_start = t
+                    break
+            cycles.append(Cycle(start if start is not None else end, match_start or end, end, games))
+            start = match_start = None
+        return cycles
+
+    @property
+    def match_time(self) -> float:
+        """Seconds spent inside matches."""
+        return sum(time for phase, time in self.phase_time.items() if phase.startswith('active'))
+
+    @property
+    def idle_time(self) -> float:
+        """Seconds not spent inside a match: inputs, loading, rate limit waits."""
+        return self.duration - self.match_time
+
+    def summary(self) -> Dict[str, Any]:
+        """
+        Headline numbers of the session.
+
+        Returns:
+            Dictionary with duration, games, per-hour throughput, idle time and stop reason
+        """
+        hours = self.duration / 3600
+        return {
+            'duration_hours': hours,
+            'games': self.games,
+            'exp': self.exp,
+            'gold': self.gold,
+            'exp_per_hour': self.exp / hours if hours else 0.0,
+            'gold_per_hour': self.gold / hours if hours else 0.0,
+            'idle_hours': self.idle_time / 3600,
+            'rate_limit_hours': sum(time for phase, time in self.phase_time.items()
+                                    if phase.startswith('exp rate limit')) / 3600,
+            'stop_reason': self.stop_reason,
+        }
+
+def simulate(overrides: Optional[Dict[str, Any]] = None, hours: float = 24.0,
+             sequence: Optional[List[str]] = None, seed: int = 0) -> SimulationResult:
+    """
+    Simulate a farming session.
+
+    Args:
+        overrides: Setting values replacing DEFAULT_CONFIG
+        hours: Simulated time limit
+        sequence: Sequences per cycle, defaults to farm_sequence(settings)
+        seed: Seed for the random key hold and delay variation
+
+    Returns:
+        SimulationResult with the timeline and throughput
+    """
+    clock = VirtualClock(seed=seed)
+    settings = SettingsStore({**DEFAULT_CONFIG, 'timer_sound': False, **(overrides or {})})
+    ui = TimelineUI(clock)
+    backend = RecordingBackend(clock=clock)
+    keyseq = KeySequence(settings, backend, ui=ui, clock=clock)
+    state = {'total_games': 0, 'total_gold': 0, 'total_exp': 0, 'current_exp': 0, 'hwnd': FAKE_HWND}
+    timer = Timer(settings, keyseq, state, ui, clock=clock)
+
+    stop_reason = []
+    def time_limit():
+        stop_reason.append('time limit')
+        timer.stop()
+
+    clock.run_until(hours * 3600, time_limit)
+    snapshot = settings.current
+    timer.run(snapshot.match_time, sequence if sequence is not None else farm_sequence(snapshot))
+    if not stop_reason:
+        # The status shown right before 'stopping...' says why the timer stopped
+        labels = [phase for _, phase in ui.phases]
+        index = len(labels) - 1 - labels[::-1].index('stopping...') if 'stopping...' in labels else 0
+        stop_reason.append(labels[index - 1].rstrip('.') if index > 0 else 'stopped')
+    logger.debug(f"Simulated {clock.now / 3600:.1f} h, {len(backend.journal)} key events")
+    return SimulationResult(ui, state, clock.now, stop_reason[0])
+
+def _parse_value(text: str) -> Any:
+    if text.lower() in ('true', 'false'):
+        return text.lower() == 'true'
+    try:
+        return int(text)
+    except ValueError:
+        return text
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='simulate a farming session on a virtual clock')
+    parser.add_argument('--hours', type=float, default=24.0, help='simulated time limit')
+    parser.add_argument('--set', action='append', default=[], metavar='KEY=VALUE', help='override a setting')
+    parser.add_argument('--cycles', type=int, default=5, help='cycle timelines to print')
+    parser.add_argument('--seed', type=int, default=0, help='seed for the random timing variation')
+    args = parser.parse_args()
+
+    overrides = {}
+    for item in args.set:
+        key, _, value = item.partition('=')
+        overrides[key] = _parse_value(value)
+
+    result = simulate(overrides, args.hours, seed=args.seed)
+    for name, value in result.summary().items():
+        print(f"{name:18} {value:.2f}" if isinstance(value, float) else f"{name:18} {value}")
+    for cycle in result.cycles[:args.cycles]:
+        print(f"game {cycle.games:4}: inputs {cycle.start:9.1f}s  match {cycle.match_start:9.1f}s  "
+              f"done {cycle.end:9.1f}s  overhead {cycle.match_start - cycle.start:5.1f}s")
@@ -0,0 +1,248 @@
+"""
+Persistent session statistics.
+Every completed farming cycle is appended as a fixed-size binary record to
+stats.dat. The file starts with a summary header that holds the record count
+and lifetime totals, so loading them never replays the records.
+"""
+
+import os
+import time
+import struct
+import threading
+import logging
+from typing import Dict, List, Optional, Iterator, NamedTuple
+from scripts.constants import STATS_FILENAME, STATS_FSYNC_RECORDS, STATS_FSYNC_SECONDS
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b'PRWL'
+VERSION = 1
+
+# magic, version, reserved, record count, total duration (s), total gold, total exp
+HEADER = struct.Struct('<4sHHQddd')
+# timestamp (unix s), match duration (s), cycle wall-clock time (s), gold, exp, variant, outcome, flags, padding
+RECORD = struct.Struct('<dffffBBBx')
+
+# Indices stored in the variant/outcome bytes, never reorder, only append
+VARIANTS = ('default', 'open_menu_hold', 'open_menu_fix', 'open_menu_fix2')
+OUTCOMES = ('completed', 'rate_limit', 'max_games')
+
+# Record flags
+FLAG_MEASURED = 0x1  # gold and exp were read from the reward screen, not estimated
+
+class CycleRecord(NamedTuple):
+    timestamp: float
+    duration: float  # configured match length
+    cycle: float  # measured wall-clock time since the previous cycle ended
+    gold: float
+    exp: float
+    variant: str
+    outcome: str
+    measured: bool = False
+
+def sequence_variant(sequence: List[str]) -> str:
+    """
+    Name the disconnect/reconnect variant a farm sequence uses.
+
+    Args:
+        sequence: Sequence names as built by farm_sequence
+
+    Returns:
+        One of VARIANTS
+    """
+    if sequence.count('open_menu_fix') > 1:
+        return 'open_menu_fix2'
+    for variant in ('open_menu_fix', 'open_menu_hold'):
+        if variant in sequence:
+            return variant
+    return 'default'
+
+class StatsStore:
+    """
+    Append-only cycle log with a summary header.
+    Records are flushed on every append, fsync is batched to every
+    STATS_FSYNC_RECORDS records or STATS_FSYNC_SECONDS, whichever comes first.
+    """
+
+    def __init__(self, filepath: str = STATS_FILENAME):
+        self.filepath = filepath
+        self.count = 0
+        self.totals = {'duration': 0.0, 'gold': 0.0, 'exp': 0.0}
+        self._lock = threading.Lock()
+        self._file = None
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+        self.load()
+
+    def load(self) -> None:
+        """Open the log and read lifetime totals from its header."""
+        try:
+            exists = os.path.exists(self.filepath)
+            self._file = open(self.filepath, 'r+b' if exists else 'w+b')
+            if not exists or not self._read_header():
+                self._reset()
+                return
+            self._recover()
+        except OSError as e:
+            logger.error(f"Could not open stats file: {e}")
+            self._file = None
+
+    def _read_header(self) -> bool:
+        """Read the summary header, returns False if the file is not a stats log."""
+        self._file.seek(0)
+        data = self._file.read(HEADER.size)
+        if len(data) < HEADER.size:
+            return False
+        magic, version, _, count, duration, gold, exp = HEADER.unpack(data)
+        if magic != MAGIC or version != VERSION:
+            logger.warning(f"Unrecognised stats file {self.filepath}, starting a new one")
+            return False
+        self.count = count
+        self.totals = {'duration': duration, 'gold': gold, 'exp': exp}
+        return True
+
+    def _reset(self) -> None:
+        """Start an empty log."""
+        self._file.seek(0)
+        self._file.truncate()
+        self.count = 0
+        self.totals = {'duration': 0.0, 'gold': 0.0, 'exp': 0.0}
+        self._write_header()
+        self._sync()
+
+    def _recover(self) -> None:
+        """
+        Reconcile the header with the records after a crash.
+        Records are written before the header, so at most the last few records
+        are missing from the totals; those are replayed, a torn record is dropped.
+        """
+        size = os.fstat(self._file.fileno()).st_size
+        stored = (size - HEADER.size) // RECORD.size
+        if HEADER.size + stored * RECORD.size != size:
+            self._file.truncate(HEADER.size + stored * RECORD.size)
+        if stored == self.count:
+            return
+        if stored < self.count:
+            # Header ahead of the data, the totals can't be trusted
+            self.count = 0
+            self.totals = {'duration': 0.0, 'gold': 0.0, 'exp': 0.0}
+        for record in self._read_records(self.count):
+            self._add(record)
+        logger.info(f"Recovered {stored} stats records")
+        self._write_header()
+        self._sync()
+
+    def _read_records(self, start: int = 0) -> Iterator[CycleRecord]:
+        """Yield records from index start to the end of the file."""
+        self._file.seek(HEADER.size + start * RECORD.size)
+        while True:
+            data = self._file.read(RECORD.size)
+            if len(data) < RECORD.size:
+                return
+            timestamp, duration, cycle, gold, exp, variant, outcome, flags = RECORD.unpack(data)
+            yield CycleRecord(timestamp, duration, cycle, gold, exp,
+                              VARIANTS[variant] if variant < len(VARIANTS) else 'unknown',
+                              OUTCOMES[outcome] if outcome < len(OUTCOMES) else 'unknown',
+                              bool(flags & FLAG_MEASURED))
+
+    def _add(self, record: CycleRecord) -> None:
+        """Add a record to the in-memory totals."""
+        self.count += 1
+        self.totals['duration'] += record.duration
+        self.totals['gold'] += record.gold
+        self.totals['exp'] += record.exp
+
+    def _write_header(self) -> None:
+        self._file.seek(0)
+        self._file.write(HEADER.pack(MAGIC, VERSION, 0, self.count,
+                                     self.totals['duration'], self.totals['gold'], self.totals['exp']))
+
+    def _sync(self) -> None:
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def append(self, duration: float, cycle: float, gold: float, exp: float,
+               variant: str = 'default', outcome: str = 'completed',
+               timestamp: Optional[float] = None, measured: bool = False) -> None:
+        """
+        Append one completed cycle and update the header totals.
+
+        Args:
+            duration: Match length in seconds
+            cycle: Measured wall-clock seconds since the previous cycle ended,
+                including inputs, loading, the match and any rate limit wait
+            gold: Gold earned
+            exp: Experience earned
+            variant: Sequence variant, one of VARIANTS
+            outcome: How the cycle ended, one of OUTCOMES
+            timestamp: Unix time the cycle ended, defaults to now
+            measured: True if gold and exp were read from the reward screen
+        """
+        record = CycleRecord(time.time() if timestamp is None else timestamp,
+                             duration, cycle, gold, exp, variant, outcome, measured)
+        with self._lock:
+            if self._file is None:
+                return
+            try:
+                self._file.seek(HEADER.size + self.count * RECORD.size)
+                self._file.write(RECORD.pack(record.timestamp, record.duration, record.cycle, record.gold, record.exp,
+                                             VARIANTS.index(variant), OUTCOMES.index(outcome),
+                                             FLAG_MEASURED if measured else 0))
+                self._add(record)
+                self._write_header()
+                self._file.flush()
+                self._unsynced += 1
+                if (self._unsynced >= STATS_FSYNC_RECORDS
+                        or time.monotonic() - self._last_sync >= STATS_FSYNC_SECONDS):
+                    self._sync()
+            except (OSError, ValueError) as e:
+                logger.error(f"Could not write stats record: {e}")
+
+    def records(self) -> List[CycleRecord]:
+        """
+        Read every record in the log.
+
+        Returns:
+            Records in the order they were written
+        """
+        with self._lock:
+            if self._file is None:
+                return []
+            self._file.flush()
+            records = list(self._read_records())
+            return records[:self.count]
+
+    def lifetime(self) -> Dict[str, float]:
+        """
+        Return lifetime totals.
+
+        Returns:
+            Dictionary with games, duration (s), gold and exp
+        """
+        return {'games': self.count, **self.totals}
+
+    def label(self, name: str) -> str:
+        """
+        Tooltip text for a session counter, including its lifetime total.
+
+        Args:
+            name: games, gold or exp
+
+        Returns:
+            Label text
+        """
+        return f'total {name} (lifetime: {int(self.lifetime()[name])})'
+
+    def close(self) -> None:
+        """Sync pending records and close the file."""
+        with self._lock:
+            if self._file is None:
+                return
+            try:
+                self._sync()
+                self._file.close()
+            except OSError as e:
+                logger.error(f"Could not close stats file: {e}")
+            self._file = None
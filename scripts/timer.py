@@ -1,39 +1,77 @@
-import time
+import math
 import threading
-import winsound
-import dearpygui.dearpygui as dpg
-from typing import List, Optional, Callable
+from collections import deque
+from typing import List, Optional, Callable, Dict
 import logging
+from scripts.ui import UIQueue
+from scripts.settings import SettingsStore
+from scripts.stats import StatsStore, sequence_variant
+from scripts.clock import Clock, CLOCK
+from scripts import optimizer
 from scripts.constants import (
     EXP_PER_MINUTE_RATIO, 
     GOLD_PER_MINUTE_RATIO, 
     EXP_RATE_LIMIT_THRESHOLD,
-    DEFAULT_RATE_LIMIT_WAIT_TIME_MINUTES
+    REWARD_RATE_LIMIT_FRACTION,
+    STOP_TIMEOUT_SECONDS
 )
 
 # Set up logging
 logger = logging.getLogger(__name__)
 
+# Per-minute rates, the constants until measured rates are loaded from history
+_rates = {'exp': EXP_PER_MINUTE_RATIO, 'gold': GOLD_PER_MINUTE_RATIO}
+
+def set_rates(exp: float, gold: float) -> None:
+    """
+    Use measured per-minute rates for the exp and gold estimates.
+
+    Args:
+        exp: Experience per minute of match time
+        gold: Gold per minute of match time
+    """
+    _rates['exp'] = exp
+    _rates['gold'] = gold
+    logger.info(f"Using measured rates: {exp:.2f} exp/min, {gold:.2f} gold/min")
+
 def calculate_exp(minutes: float) -> float:
     """Calculate experience points based on minutes played."""
-    return minutes * EXP_PER_MINUTE_RATIO
+    return minutes * _rates['exp']
 
 def calculate_gold(minutes: float) -> float:
     """Calculate gold based on minutes played."""
-    return minutes * GOLD_PER_MINUTE_RATIO
+    return minutes * _rates['gold']
 
 class Timer:
-    def __init__(self, config: dict, keyseq, state: dict):
+    def __init__(self, settings: SettingsStore, keyseq, state: dict, ui: Optional[UIQueue] = None,
+                 stats: Optional[StatsStore] = None, clock: Clock = CLOCK, rewards=None):
+        self.settings = settings
         self.keyseq = keyseq
         self.state = state
+        self.ui = ui or keyseq.ui
+        self.stats = stats
+        # RewardReader for the real gold and exp, estimates are used without one
+        self.rewards = rewards if rewards and rewards.available else None
+        self.clock = clock
         self.initial_time = 0
         self.remaining_time = 0
-        self.waiting_time = config.get('rate_limit_wait_time', DEFAULT_RATE_LIMIT_WAIT_TIME_MINUTES) * 60
         self.running = False
         self.paused = False
         self.pressing = False
+        # Set when stopping, wakes every countdown, wait and inter-key delay
+        self._stop_event = threading.Event()
+        # Cleared while paused
+        self._resume_event = threading.Event()
+        self._resume_event.set()
         self._timer_thread: Optional[threading.Thread] = None
         self.on_stop_callback: Optional[Callable] = None
+        self.last_drift = 0.0
+        self.drift_history = deque(maxlen=100)
+        # Wall-clock time of the input sequence per cycle, the optimizer's overhead
+        self.overhead_history = deque(maxlen=20)
+        # Monotonic time the previous cycle was recorded (or the run started)
+        self._cycle_origin = 0.0
+        self._next_match_time: Optional[int] = None
 
     def set_on_stop_callback(self, callback: Callable) -> None:
         """Set callback function to be called when timer stops."""
@@ -48,15 +86,21 @@ class Timer:
             sequence: List of action sequences to execute
         """
         if self.running:
-            dpg.configure_item('farm_status', label='already active')
+            self.ui.status('already active')
             return
             
+        problem = self.keyseq.problem(sequence)
+        if problem:
+            logger.error(f"Timer not started, {problem}")
+            self.ui.status('sequence file error, see log')
+            return
+
+        # A previous run that was told to stop may still be releasing a key
+        if self._timer_thread and self._timer_thread.is_alive():
+            self._timer_thread.join()
+
         try:
-            self.initial_time = minutes * 60
-            self.remaining_time = self.initial_time
-            self.sequence = sequence
-            self.running = True
-            self.paused = False
+            self._reset(minutes, sequence)
             self._timer_thread = threading.Thread(target=self._run, daemon=True)
             self._timer_thread.start()
             logger.info(f"Timer started for {minutes} minutes with sequence: {sequence}")
@@ -64,111 +108,281 @@ class Timer:
             logger.error(f"Error starting timer: {e}")
             self.running = False
 
+    def run(self, minutes: int, sequence: List[str]) -> None:
+        """
+        Run the timer loop in the calling thread until it stops.
+        Used with a VirtualClock to simulate whole sessions.
+
+        Args:
+            minutes: Duration in minutes
+            sequence: List of action sequences to execute
+        """
+        self._reset(minutes, sequence)
+        self._run()
+
+    def _reset(self, minutes: int, sequence: List[str]) -> None:
+        """Prepare the run state for a new session."""
+        self.initial_time = minutes * 60
+        self.remaining_time = self.initial_time
+        self.sequence = sequence
+        self.running = True
+        self.paused = False
+        self._stop_event.clear()
+        self._resume_event.set()
+        self._cycle_origin = self.clock.monotonic()
+
     def stop(self) -> None:
-        """Stop the timer and clean up resources."""
+        """
+        Stop the timer and clean up resources.
+
+        Returns within STOP_TIMEOUT_SECONDS: any wait in progress wakes up
+        immediately, a key that is currently held is still released by the
+        worker before it exits.
+        """
         try:
             if self.on_stop_callback:
                 self.on_stop_callback()
         except Exception as e:
             logger.error(f"Error in stop callback: {e}")
             
-        dpg.configure_item('farm_status', label='stopping...')
+        self.ui.status('stopping...')
         self.running = False
+        self._stop_event.set()
+        self._resume_event.set()
         
-        # Wait for thread to finish with timeout
-        if self._timer_thread and self._timer_thread.is_alive():
-            self._timer_thread.join(timeout=5)
-            
-        self._timer_thread = None
-        dpg.configure_item('farm_status', label='inactive')
+        # Wait for thread to finish with timeout (unless stopping from the timer thread itself)
+        thread = self._timer_thread
+        if thread and thread.is_alive() and thread is not threading.current_thread():
+            thread.join(timeout=STOP_TIMEOUT_SECONDS)
+
+        # A worker still releasing a key keeps its handle, so start() joins it
+        # before _reset() could wake it up again next to the new worker
+        if thread and not thread.is_alive():
+            self._timer_thread = None
+        self.ui.status('inactive')
         logger.info("Timer stopped")
 
     def pause(self) -> None:
         """Toggle pause state of the timer."""
         if self.running:
             self.paused = not self.paused
+            if self.paused:
+                self._resume_event.clear()
+            else:
+                self._resume_event.set()
             status = 'paused' if self.paused else 'resumed'
-            dpg.configure_item('farm_status', label=f'{status}')
+            self.ui.status(f'{status}')
             logger.info(f"Timer {status}")
 
+    def sleep(self, seconds: float) -> bool:
+        """
+        Sleep that wakes up as soon as the timer is stopped.
+
+        Args:
+            seconds: Time to sleep in seconds
+
+        Returns:
+            True if the timer is still running afterwards, False if stopped
+        """
+        if seconds > 0:
+            self.clock.wait(self._stop_event, seconds)
+        return self.running
+
     def _run(self) -> None:
         """Main timer loop - runs in separate thread."""
         try:
             while self.running:
                 self.pressing = True
-                self.keyseq.action(self.sequence, lambda: self.running, self.state['hwnd'])
+                sequence = self.sequence
+                if self._next_match_time:
+                    sequence = self._change_match_time(sequence)
+                cycle_start = self.clock.monotonic()
+                self.keyseq.action(sequence, lambda: self.running, self.state['hwnd'], self.sleep)
                 self.pressing = False
 
                 if 'lobby_setup_finish' in self.sequence:
                     self.stop()
                     return
+                if self.running and sequence is self.sequence and not self.paused:
+                    self.overhead_history.append(self.clock.monotonic() - cycle_start)
 
-                while self.remaining_time > 0 and self.running:
-                    if self.paused:
-                        while self.paused and self.running:
-                            time.sleep(1)
-                        continue
-                        
-                    mins, secs = divmod(self.remaining_time, 60)
-                    dpg.configure_item('farm_status', label=f'active ({mins}:{secs:02})')
-                    time.sleep(1)
-                    self.remaining_time -= 1
-
-                if self.remaining_time == 0 and self.running:
+                if self._countdown(self.initial_time, 'active ({}:{:02})') and self.running:
                     self._handle_timer_completion()
+                    self._optimize_match_time()
 
         except Exception as e:
             logger.error(f"Error in timer thread: {e}")
             self.running = False
         finally:
-            dpg.configure_item('farm_status', label='inactive')
+            self.ui.status('inactive')
+
+    def _countdown(self, seconds: int, label: str) -> bool:
+        """
+        Count down to a monotonic deadline, updating the status once per second.
+
+        The remaining time is derived from the deadline on every tick, so UI
+        calls and loop overhead do not accumulate. Time spent paused pushes
+        the deadline back.
+
+        Args:
+            seconds: Countdown duration in seconds
+            label: Status format string taking minutes and seconds
+
+        Returns:
+            True if the countdown ran to completion, False if stopped
+        """
+        start = self.clock.monotonic()
+        deadline = start + seconds
+        paused_for = 0.0
+        while self.running:
+            if self.paused:
+                pause_start = self.clock.monotonic()
+                self.clock.wait(self._resume_event)
+                paused = self.clock.monotonic() - pause_start
+                deadline += paused
+                paused_for += paused
+                continue
+
+            left = deadline - self.clock.monotonic()
+            if left <= 0:
+                break
+            self.remaining_time = math.ceil(left)
+            mins, secs = divmod(self.remaining_time, 60)
+            self.ui.status(label.format(mins, secs))
+            # Sleep until the next whole second before the deadline
+            self.clock.wait(self._stop_event, left - (self.remaining_time - 1))
+        else:
+            return False
+
+        self.remaining_time = 0
+        self.last_drift = self.clock.monotonic() - start - paused_for - seconds
+        self.drift_history.append(self.last_drift)
+        logger.debug(f"Countdown of {seconds}s finished with {self.last_drift * 1000:.1f} ms drift")
+        return True
+
+    def drift_stats(self) -> Dict[str, float]:
+        """
+        Return the measured countdown drift in seconds.
+
+        Returns:
+            Dictionary with the last, mean and worst absolute drift
+        """
+        history = self.drift_history
+        return {
+            'last': self.last_drift,
+            'mean': sum(history) / len(history) if history else 0.0,
+            'max': max(map(abs, history), default=0.0),
+        }
 
     def _handle_timer_completion(self) -> None:
         """Handle actions when timer completes a cycle."""
+        settings = self.settings.current
         try:
             # Play sound if enabled
-            if dpg.get_value('timer_sound'):
-                winsound.Beep(dpg.get_value('beep_frequency'), dpg.get_value('beep_duration'))
+            if settings.timer_sound:
+                import winsound
+                winsound.Beep(settings.beep_frequency, settings.beep_duration)
 
-            # Update statistics
-            exp_gain = calculate_exp(self.initial_time / 60)
-            gold_gain = calculate_gold(self.initial_time / 60)
+            # Update statistics, from the reward screen when it can be read
+            expected_exp = calculate_exp(self.initial_time / 60)
+            reader = self.rewards if settings.pixel_search else None
+            reward = reader.wait(self.state['hwnd'], self.sleep) if reader else None
+            if reward:
+                gold_gain, exp_gain = reward.gold, reward.exp
+                logger.info(f"Reward screen: {gold_gain} gold, {exp_gain} exp")
+            else:
+                gold_gain, exp_gain = calculate_gold(self.initial_time / 60), expected_exp
             self.state['total_games'] += 1
             self.state['total_gold'] += gold_gain
             self.state['total_exp'] += exp_gain
             self.state['current_exp'] += exp_gain
+            if self.keyseq.detector:
+                saved = self.keyseq.detector.end_cycle()
+                logger.info(f"Pixel search saved {saved:.1f}s this cycle")
+            waits = self.keyseq.waits
+            if waits and settings.adaptive_waits:
+                # No reward screen after a match means the inputs went wrong somewhere
+                if reader and not reward and self.running:
+                    waits.fail()
+                else:
+                    waits.end_cycle()
             
             # Update UI
-            dpg.configure_item('total_games', label=int(self.state['total_games']))
-            dpg.configure_item('total_gold', label=int(self.state['total_gold']))
-            dpg.configure_item('total_exp', label=int(self.state['total_exp']))
+            self.ui.configure('total_games', label=int(self.state['total_games']))
+            self.ui.configure('total_gold', label=int(self.state['total_gold']))
+            self.ui.configure('total_exp', label=int(self.state['total_exp']))
+
+            if reward:
+                # A rate limited match awards little or no exp
+                rate_limited = settings.rate_limit_detect and exp_gain < expected_exp * REWARD_RATE_LIMIT_FRACTION
+            else:
+                rate_limited = settings.rate_limit_detect and self.state['current_exp'] >= EXP_RATE_LIMIT_THRESHOLD
+            max_games = settings.max_games and self.state['total_games'] >= settings.max_games_amount
+            if self.stats:
+                outcome = 'rate_limit' if rate_limited else 'max_games' if max_games else 'completed'
+                # Wall-clock cycle time, a rate limit wait after this cycle counts towards the next one
+                now = self.clock.monotonic()
+                cycle, self._cycle_origin = now - self._cycle_origin, now
+                self.stats.append(self.initial_time, cycle, gold_gain, exp_gain, sequence_variant(self.sequence), outcome,
+                                  self.clock.time(), measured=reward is not None)
+                for name in ('games', 'gold', 'exp'):
+                    self.ui.set_value(f'total_{name}_tooltip', self.stats.label(name))
 
             # Handle rate limiting
-            if dpg.get_value('rate_limit_detect') and self.state['current_exp'] >= EXP_RATE_LIMIT_THRESHOLD:
-                dpg.configure_item('farm_status', label='exp rate limit...')
-                if dpg.get_value('rate_limit_wait'):
+            if rate_limited:
+                self.ui.status('exp rate limit...')
+                if settings.rate_limit_wait:
                     self._wait_for_rate_limit_reset()
                 else:
                     self.stop()
                     return
 
-            self.remaining_time = self.initial_time
-
             # Check max games limit
-            if dpg.get_value('max_games') and self.state['total_games'] >= dpg.get_value('max_games_amount'):
-                dpg.configure_item('farm_status', label='max games reached...')
+            if max_games:
+                self.ui.status('max games reached...')
                 self.stop()
                 return
                 
         except Exception as e:
             logger.error(f"Error handling timer completion: {e}")
 
+    def _optimize_match_time(self) -> None:
+        """Schedule a better match time for the next cycle if auto match time is on."""
+        settings = self.settings.current
+        if not settings.auto_match_time or not self.running:
+            return
+        overhead = optimizer.measured_overhead(self.overhead_history, settings)
+        plan = optimizer.compare(settings, overhead, calculate_exp(1), calculate_gold(1))
+        if plan:
+            logger.info(f"Match time {settings.match_time} -> {plan.match_time} min: "
+                        f"{plan.exp_per_hour:.0f} exp/h, {plan.gold_per_hour:.0f} gold/h")
+            self._next_match_time = plan.match_time
+
+    def _change_match_time(self, sequence: List[str]) -> List[str]:
+        """
+        Wait for the lobby, change MATCH TIME in game rules and adopt it.
+
+        Args:
+            sequence: Cycle sequence about to run
+
+        Returns:
+            The sequence left to run after the change
+        """
+        current, target = self.settings.current.match_time, self._next_match_time
+        self._next_match_time = None
+        if sequence and sequence[0] == 'wait_restart':
+            self.keyseq.action(sequence[:1], lambda: self.running, self.state['hwnd'], self.sleep)
+            sequence = sequence[1:]
+        self.keyseq.set_match_time(current, target, lambda: self.running, self.state['hwnd'], self.sleep)
+        if self.running:
+            self.settings.update('match_time', target)
+            self.initial_time = target * 60
+            self.ui.set_value('match_time', target)
+            self.ui.configure('match_time', format=f"{target} minute{'s' if target != 1 else ''}")
+        return sequence
+
     def _wait_for_rate_limit_reset(self) -> None:
         """Wait for rate limit to reset."""
-        self.remaining_time = self.waiting_time
-        while self.remaining_time > 0 and self.running:
-            mins, secs = divmod(self.remaining_time, 60)
-            dpg.configure_item('farm_status', label=f'exp rate limit reset in {mins}:{secs:02}')
-            time.sleep(1)
-            self.remaining_time -= 1
-        self.state['current_exp'] = 0
+        waiting_time = self.settings.current.rate_limit_wait_time * 60
+        if self._countdown(waiting_time, 'exp rate limit reset in {}:{:02}'):
+            self.state['current_exp'] = 0
@@ -0,0 +1,151 @@
+"""
+Coalescing UI update queue.
+Worker threads post widget updates here instead of calling DearPyGui
+directly; the render loop drains the queue once per frame.
+"""
+
+import re
+import time
+import threading
+import logging
+from typing import Dict, Tuple, Any, Optional
+
+logger = logging.getLogger(__name__)
+
+# Pending key for dpg.set_value updates, everything else is a configure_item keyword
+_VALUE = 'default_value'
+
+class UIQueue:
+    """
+    Thread-safe queue that keeps only the latest value per (tag, field).
+    Posting never touches DearPyGui, so a stalled frame cannot delay the caller.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending: Dict[Tuple[str, str], Any] = {}
+        self._ids: Dict[str, int] = {}
+        self.posted = 0
+        self.applied = 0
+
+    def configure(self, tag: str, **kwargs: Any) -> None:
+        """
+        Queue a configure_item call, replacing any pending value for the same fields.
+
+        Args:
+            tag: Widget tag
+            **kwargs: Item configuration to apply
+        """
+        with self._lock:
+            for field, value in kwargs.items():
+                self._pending[(tag, field)] = value
+            self.posted += len(kwargs)
+
+    def set_value(self, tag: str, value: Any) -> None:
+        """
+        Queue a set_value call for a widget.
+
+        Args:
+            tag: Widget tag
+            value: New widget value
+        """
+        self.configure(tag, **{_VALUE: value})
+
+    def status(self, label: str) -> None:
+        """
+        Queue a new farm status label.
+
+        Args:
+            label: Status text
+        """
+        self.configure('farm_status', label=label)
+
+    def drain(self) -> int:
+        """
+        Apply all pending updates, must be called from the render thread.
+
+        Returns:
+            Number of widget updates applied
+        """
+        with self._lock:
+            if not self._pending:
+                return 0
+            pending, self._pending = self._pending, {}
+
+        import dearpygui.dearpygui as dpg
+
+        grouped: Dict[str, Dict[str, Any]] = {}
+        for (tag, field), value in pending.items():
+            grouped.setdefault(tag, {})[field] = value
+
+        applied = 0
+        for tag, fields in grouped.items():
+            item = self._item(tag)
+            if item is None:
+                continue
+            try:
+                if _VALUE in fields:
+                    dpg.set_value(item, fields.pop(_VALUE))
+                    applied += 1
+                if fields:
+                    dpg.configure_item(item, **fields)
+                    applied += len(fields)
+            except Exception as e:
+                logger.warning(f"Could not update UI item '{tag}': {e}")
+                self._ids.pop(tag, None)
+        self.applied += applied
+        return applied
+
+    def _item(self, tag: str) -> Optional[int]:
+        """Resolve a tag to its item ID once and cache it."""
+        item = self._ids.get(tag)
+        if item is None:
+            import dearpygui.dearpygui as dpg
+            try:
+                item = dpg.get_alias_id(tag)
+            except Exception:
+                item = 0
+            if not item:
+                logger.warning(f"UI item '{tag}' not found")
+                return None
+            self._ids[tag] = item
+        return item
+
+class StatusLog:
+    """
+    Drop-in replacement for UIQueue when running without a GUI.
+    Status changes and counters are written to the log instead of widgets;
+    countdown labels that only differ by their numbers are throttled.
+    """
+
+    def __init__(self, interval: float = 60.0):
+        self.interval = interval
+        self._last_shape: Optional[str] = None
+        self._last_time = 0.0
+        self._counters: Dict[str, Any] = {}
+
+    def configure(self, tag: str, **kwargs: Any) -> None:
+        label = kwargs.get('label')
+        if label is None:
+            return
+        if tag == 'farm_status':
+            self.status(label)
+        elif tag.startswith('total_'):
+            self._counters[tag[len('total_'):]] = label
+            # Timer updates exp last, log the whole set once per cycle
+            if tag == 'total_exp':
+                logger.info(' | '.join(f'{name}: {value}' for name, value in self._counters.items()))
+
+    def set_value(self, tag: str, value: Any) -> None:
+        pass
+
+    def status(self, label: str) -> None:
+        shape = re.sub(r'\d+', '#', label)
+        now = time.monotonic()
+        if shape != self._last_shape or now - self._last_time >= self.interval:
+            self._last_shape = shape
+            self._last_time = now
+            logger.info(label)
+
+    def drain(self) -> int:
+        return 0
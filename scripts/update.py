@@ -1,4 +1,3 @@
-import requests
 import json
 import re
 from typing import Tuple, Optional
@@ -45,6 +44,9 @@ class Update:
         Returns:
             Tuple of (message, is_update_available)
         """
+        # Imported on first use, requests is slow to import and rarely needed
+        import requests
+
         try:
             response = requests.get(self.api_url, timeout=10)
             response.raise_for_status()
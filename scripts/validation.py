@@ -4,7 +4,8 @@ Provides input validation and sanitization functions.
 """
 
 import logging
-from typing import Union, Any, Tuple
+from typing import Union, Any, Optional
+from scripts import schema as settings_schema
 
 logger = logging.getLogger(__name__)
 
@@ -23,6 +24,7 @@ def validate_range(value: Union[int, float], min_val: Union[int, float], max_val
         Validated value within range
     """
     try:
+        if isinstance(value, str):
             try:
                 value = int(value)
             except ValueError:
@@ -104,18 +106,25 @@ def sanitize_key_name(key_name: str) -> str:
     
     return sanitized if sanitized else 'unknown'
 
-def validate_config_value(key: str, value: Any, config_schema: dict) -> Any:
+def validate_config_value(key: str, value: Any, config_schema: Optional[dict] = None) -> Any:
     """
     Validate configuration value against schema.
     
     Args:
         key: Configuration key
         value: Value to validate
-        config_schema: Schema defining allowed values/ranges
+        config_schema: Schema defining allowed values/ranges, defaults to
+            the settings schema in scripts.schema
         
     Returns:
         Validated value
     """
+    if config_schema is None:
+        if key not in settings_schema.VALIDATORS:
+            logger.warning(f"Unknown config key: {key}")
+            return value
+        return settings_schema.validate(key, value)
+
     if key not in config_schema:
         logger.warning(f"Unknown config key: {key}")
         return value
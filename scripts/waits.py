@@ -0,0 +1,119 @@
+"""
+Adaptive waits for the load, restart and reconnect phases.
+Every time pixel search sees the screen a wait was waiting for, the time it
+took is recorded under the setting that wait comes from. With adaptive waits
+on, a wait pixel search is watching lasts a high percentile of that history
+plus a margin, capped by its slider, so a template miss costs less than the
+full slider value. A shortened wait whose screen never appears, or a missing
+reward screen, counts as a failed cycle and the sliders are used again for a
+few cycles.
+The history is kept in waits.json so it carries over between sessions.
+"""
+
+import os
+import json
+import math
+import threading
+import logging
+from collections import deque
+from typing import Deque, Dict, Optional
+from scripts.constants import (
+    WAITS_FILENAME,
+    WAIT_HISTORY,
+    WAIT_MIN_SAMPLES,
+    WAIT_PERCENTILE,
+    WAIT_MARGIN_SECONDS,
+    WAIT_FALLBACK_CYCLES
+)
+
+logger = logging.getLogger(__name__)
+
+def percentile(samples, q: float) -> float:
+    """Nearest-rank percentile of a non-empty sequence."""
+    ordered = sorted(samples)
+    return ordered[max(0, math.ceil(q / 100 * len(ordered)) - 1)]
+
+class WaitHistory:
+    """Observed phase durations per wait setting, in seconds."""
+
+    def __init__(self, filepath: Optional[str] = WAITS_FILENAME):
+        self.filepath = filepath
+        self.samples: Dict[str, Deque[float]] = {}
+        self._lock = threading.Lock()
+        self._changed = False
+        self.fallback = 0
+        self.failures = 0
+        self.load()
+
+    def load(self) -> None:
+        """Read the saved history, a missing or broken file starts empty."""
+        if not self.filepath or not os.path.exists(self.filepath):
+            return
+        try:
+            with open(self.filepath, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            for key, values in data.items():
+                self.samples[key] = deque((float(v) for v in values), maxlen=WAIT_HISTORY)
+        except (OSError, ValueError, TypeError, AttributeError) as e:
+            logger.warning(f"Ignoring wait history {self.filepath}: {e}")
+            self.samples = {}
+
+    def save(self) -> None:
+        """Write the history if it changed, through a temporary file."""
+        if not self.filepath or not self._changed:
+            return
+        with self._lock:
+            data = {key: [round(v, 2) for v in values] for key, values in self.samples.items()}
+            self._changed = False
+        try:
+            temp = f'{self.filepath}.tmp'
+            with open(temp, 'w', encoding='utf-8') as f:
+                json.dump(data, f)
+            os.replace(temp, self.filepath)
+        except OSError as e:
+            logger.error(f"Error saving wait history: {e}")
+
+    def observe(self, key: str, seconds: float) -> None:
+        """
+        Record how long a phase really took.
+
+        Args:
+            key: Setting the wait comes from
+            seconds: Time until the expected screen appeared
+        """
+        with self._lock:
+            self.samples.setdefault(key, deque(maxlen=WAIT_HISTORY)).append(seconds)
+            self._changed = True
+
+    def duration(self, key: str, configured: float) -> float:
+        """
+        How long a wait should last.
+
+        Args:
+            key: Setting the wait comes from
+            configured: The setting's value in seconds, the upper bound
+
+        Returns:
+            Percentile plus margin once there is enough history and no
+            recent failure, otherwise the configured value
+        """
+        samples = self.samples.get(key)
+        if self.fallback or not samples or len(samples) < WAIT_MIN_SAMPLES:
+            return configured
+        return min(configured, percentile(samples, WAIT_PERCENTILE) + WAIT_MARGIN_SECONDS)
+
+    def fail(self) -> None:
+        """A cycle went wrong, use the configured waits for the next few cycles."""
+        self.failures += 1
+        self.fallback = WAIT_FALLBACK_CYCLES
+        logger.warning(f"Adaptive waits off for {WAIT_FALLBACK_CYCLES} cycles after a failed cycle")
+
+    def end_cycle(self) -> None:
+        """Count down the fallback after a completed cycle."""
+        if self.fallback:
+            self.fallback -= 1
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """Sample count and percentile per wait setting."""
+        return {key: {'samples': len(values), 'percentile': percentile(values, WAIT_PERCENTILE)}
+                for key, values in self.samples.items() if values}
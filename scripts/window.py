@@ -2,14 +2,96 @@ import win32gui
 import win32con
 import win32api
 import win32process
-import win32com.client
-from typing import Optional
+import time
+import threading
+from typing import Optional, Dict, Any
+from scripts.clock import Clock, CLOCK
 import logging
 
 # Set up basic logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+class WindowLocator:
+    """
+    Caches the Brawlhalla window handle together with its process id and
+    executable name. A cached handle is revalidated with a single IsWindow
+    check; the full lookup only runs again once the window goes away.
+    """
+
+    def __init__(self, title: str = 'Brawlhalla', exe_name: str = 'brawlhalla.exe'):
+        self.title = title
+        self.exe_name = exe_name
+        self.hwnd: Optional[int] = None
+        self.pid: Optional[int] = None
+        self.exe: Optional[str] = None
+        self.hits = 0
+        self.misses = 0
+        self.lookup_time = 0.0
+
+    def find(self) -> Optional[int]:
+        """
+        Find the Brawlhalla window handle.
+
+        Returns:
+            Window handle if found, None otherwise
+        """
+        if self.hwnd and win32gui.IsWindow(self.hwnd):
+            self.hits += 1
+            return self.hwnd
+
+        self.misses += 1
+        start = time.perf_counter()
+        try:
+            self.hwnd, self.pid, self.exe = self._lookup()
+        finally:
+            self.lookup_time += time.perf_counter() - start
+        return self.hwnd
+
+    def invalidate(self) -> None:
+        """Forget the cached window so the next find() does a full lookup."""
+        self.hwnd = self.pid = self.exe = None
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Return cache statistics.
+
+        Returns:
+            Dictionary with hits, misses, hit rate and average full lookup cost in seconds
+        """
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0,
+            'lookup_avg': self.lookup_time / self.misses if self.misses else 0.0,
+        }
+
+    def _lookup(self):
+        """Full window and process lookup, returns (hwnd, pid, exe) or Nones."""
+        hwnd = win32gui.FindWindow(None, self.title)
+        if hwnd:
+            try:
+                _, pid = win32process.GetWindowThreadProcessId(hwnd)
+                handle = win32api.OpenProcess(
+                    win32con.PROCESS_QUERY_INFORMATION | win32con.PROCESS_VM_READ, 
+                    False, 
+                    pid
+                )
+                try:
+                    proc_name = win32process.GetModuleFileNameEx(handle, 0)
+                    if self.exe_name in proc_name.lower():
+                        return hwnd, pid, proc_name
+                finally:
+                    # Always close the process handle
+                    win32api.CloseHandle(handle)
+            except Exception as e:
+                logger.warning(f"Error checking Brawlhalla process: {e}")
+        return None, None, None
+
+# Shared locator used by the module level helpers
+locator = WindowLocator()
+
 def find() -> Optional[int]:
     """
     Find the Brawlhalla window handle.
@@ -17,25 +99,7 @@ def find() -> Optional[int]:
     Returns:
         Window handle if found, None otherwise
     """
-    hwnd = win32gui.FindWindow(None, 'Brawlhalla')
-    if hwnd:
-        try:
-            _, pid = win32process.GetWindowThreadProcessId(hwnd)
-            handle = win32api.OpenProcess(
-                win32con.PROCESS_QUERY_INFORMATION | win32con.PROCESS_VM_READ, 
-                False, 
-                pid
-            )
-            try:
-                proc_name = win32process.GetModuleFileNameEx(handle, 0)
-                if 'brawlhalla.exe' in proc_name.lower():
-                    return hwnd
-            finally:
-                # Always close the process handle
-                win32api.CloseHandle(handle)
-        except Exception as e:
-            logger.warning(f"Error checking Brawlhalla process: {e}")
-    return None
+    return locator.find()
 
 def running() -> bool:
     """Check if Brawlhalla is currently running."""
@@ -94,6 +158,80 @@ def visible(hwnd: Optional[int]) -> bool:
             logger.error(f"Error checking window visibility: {e}")
     return False
 
+class _ThreadShell:
+    """
+    WScript.Shell owned by one thread. COM objects can only be used from the
+    apartment that created them, so every thread gets its own, and COM is
+    uninitialised on that thread when its thread-local storage is cleared.
+    """
+
+    def __init__(self):
+        import pythoncom
+        import win32com.client
+        pythoncom.CoInitialize()
+        self.shell = win32com.client.Dispatch('WScript.Shell')
+
+    def __del__(self):
+        self.shell = None
+        try:
+            import pythoncom
+            pythoncom.CoUninitialize()
+        except Exception:
+            pass
+
+class ActivationManager:
+    """
+    Brings the game window to the foreground for direct input.
+    Keeps one WScript.Shell per thread (the GUI thread and each timer worker)
+    and skips the whole dance when the window already has focus.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+        self.activations = 0
+        self.skipped = 0
+
+    def activate(self, hwnd: Optional[int]) -> bool:
+        """
+        Activate and bring window to foreground.
+
+        Args:
+            hwnd: Window handle
+
+        Returns:
+            True if the window is in the foreground, False otherwise
+        """
+        if not hwnd:
+            return False
+        try:
+            if win32gui.GetForegroundWindow() == hwnd:
+                self.skipped += 1
+                return True
+
+            # Press Alt key before activating (Windows requirement)
+            self._get_shell().SendKeys('%')
+            win32gui.SetForegroundWindow(hwnd)
+            self.activations += 1
+            return True
+        except Exception as e:
+            # Rebuild this thread's shell on the next call
+            self._local.holder = None
+            logger.error(f"Error activating window: {e}")
+        return False
+
+    def stats(self) -> Dict[str, int]:
+        """Return how many activations were performed and how many were avoided."""
+        return {'activations': self.activations, 'skipped': self.skipped}
+
+    def _get_shell(self):
+        holder = getattr(self._local, 'holder', None)
+        if holder is None:
+            holder = self._local.holder = _ThreadShell()
+        return holder.shell
+
+# Shared activation manager used by activate()
+activator = ActivationManager()
+
 def activate(hwnd: Optional[int]) -> bool:
     """
     Activate and bring window to foreground.
@@ -104,21 +242,15 @@ def activate(hwnd: Optional[int]) -> bool:
     Returns:
         True if successful, False otherwise
     """
-    if hwnd:
-        try:
-            # Press Alt key before activating (Windows requirement)
-            shell = win32com.client.Dispatch('WScript.Shell')
-            shell.SendKeys('%')
-            win32gui.SetForegroundWindow(hwnd)
-            return True
-        except Exception as e:
-            logger.error(f"Error activating window: {e}")
-    return False
+    return activator.activate(hwnd)
 
-def close() -> bool:
+def close(clock: Clock = CLOCK) -> bool:
     """
     Safely close Brawlhalla process.
     
+    Args:
+        clock: Clock used for the grace period
+
     Returns:
         True if successful, False otherwise
     """
@@ -129,8 +261,7 @@ def close() -> bool:
             win32gui.PostMessage(hwnd, win32con.WM_CLOSE, 0, 0)
             
             # Give it a moment to close gracefully
-            import time
-            time.sleep(2)
+            clock.sleep(2)
             
             # Check if it's still running
             if find():
@@ -139,6 +270,7 @@ def close() -> bool:
                 handle = win32api.OpenProcess(win32con.PROCESS_TERMINATE, False, pid)
                 try:
                     win32api.TerminateProcess(handle, 0)
+                    locator.invalidate()
                     logger.info("Brawlhalla process terminated")
                     return True
                 finally: